@@ -2,24 +2,36 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.exceptions import HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
 import logging
 import uuid
+from flask_backend.app.utils.read_routing import RoutingSession, init_read_replica
+from flask_backend.app.utils.sqlite_tuning import tune_sqlite_engine
+from flask_backend.app.utils.metrics import init_metrics, instrument_engine
+from flask_backend.app.utils.profiling import init_profiling, log_slow_queries
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
     app.config.from_object('flask_backend.app.config.Config')
+    if test_config:
+        app.config.update(test_config)
+    hops = int(app.config.get('TRUSTED_PROXY_HOPS', 0))
+    if hops:
+        # behind nginx: take the client address from X-Forwarded-For, trusting only our own proxies
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
 
     CORS(
         app,
         resources={r"/api/*": {"origins": "*"}},
         supports_credentials=True,
-        expose_headers=["Content-Type"],
+        expose_headers=["Content-Type", "X-Next-Cursor"],
         allow_headers=["Content-Type", "Authorization"],
         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"]
     )
     db.init_app(app)
+    init_read_replica(app)
 
     # Logging setup
     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
@@ -35,12 +47,21 @@ def create_app():
     app.register_blueprint(users.bp)
     app.register_blueprint(admin.bp)
     app.register_blueprint(receipts.bp)
+    if app.config.get('METRICS_ENABLED'):
+        from flask_backend.app.routes import metrics
+        app.register_blueprint(metrics.bp)
+        init_metrics(app)
+
+    from flask_backend.app.commands import register_commands
+    register_commands(app)
 
     @app.before_request
     def add_correlation_id():
         cid = request.headers.get('X-Correlation-ID') or str(uuid.uuid4())
         request.correlation_id = cid
 
+    init_profiling(app)
+
     @app.errorhandler(Exception)
     def handle_exception(e):
         if isinstance(e, HTTPException):
@@ -59,6 +80,13 @@ def create_app():
         }), code
 
     with app.app_context():
+        for engine in [*db.engines.values(), app.extensions.get('read_replica')]:
+            if engine is not None:
+                tune_sqlite_engine(engine, app.config)
+                if app.config.get('METRICS_ENABLED'):
+                    instrument_engine(engine)
+                if app.config.get('SLOW_QUERY_MS'):
+                    log_slow_queries(engine, float(app.config['SLOW_QUERY_MS']), app.config.get('SLOW_QUERY_LOG_PARAMETERS', False))
         db.create_all()
 
     return app
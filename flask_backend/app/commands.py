@@ -0,0 +1,54 @@
+import click
+from flask.cli import with_appcontext
+
+@click.command('upgrade-db')
+@with_appcontext
+def upgrade_db_command():
+    """Add missing tables and indexes to an existing database."""
+    from flask_backend.app.migrations import upgrade_schema
+    applied = upgrade_schema()
+    for change in applied:
+        click.echo(f'created {change}')
+    click.echo(f'{len(applied)} change(s) applied')
+
+@click.command('backfill-aggregates')
+@click.option('--from', 'start', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='First day to rebuild (default: all)')
+@click.option('--to', 'end', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Last day to rebuild (default: all)')
+@with_appcontext
+def backfill_aggregates_command(start, end):
+    """Rebuild the daily per-account aggregates from transactions."""
+    from flask_backend.app.services.aggregate_service import rebuild_daily_aggregates
+    rows = rebuild_daily_aggregates(start.date() if start else None, end.date() if end else None)
+    click.echo(f'{rows} aggregate row(s) written')
+
+@click.command('ingest-transactions')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default=None, help='Input format (default: from the file extension)')
+@with_appcontext
+def ingest_transactions_command(path, fmt):
+    """Apply a CSV or NDJSON settlement batch of deposits and withdrawals."""
+    from flask_backend.app.services.bulk_service import ingest_transactions
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        summary = ingest_transactions(f, fmt)
+    click.echo(f"{summary['applied']} applied, {summary['rejected']} rejected")
+    click.echo(f"results: {summary['result_file']}")
+
+@click.command('import-users')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default=None, help='Input format (default: from the file extension)')
+@with_appcontext
+def import_users_command(path, fmt):
+    """Create users and their accounts from a CSV of name,email,phone,account_number,pin."""
+    from flask_backend.app.services.bulk_service import import_users
+    fmt = fmt or ('ndjson' if path.lower().endswith('.ndjson') else 'csv')
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        summary = import_users(f, fmt)
+    click.echo(f"{summary['accepted']} accepted, {summary['rejected']} rejected")
+    click.echo(f"results: {summary['result_file']}")
+
+def register_commands(app):
+    app.cli.add_command(upgrade_db_command)
+    app.cli.add_command(backfill_aggregates_command)
+    app.cli.add_command(ingest_transactions_command)
+    app.cli.add_command(import_users_command)
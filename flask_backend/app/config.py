@@ -1,12 +1,103 @@
 import os
 
+# flask_backend/, so default file paths do not depend on the working directory
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI', 'sqlite:///atm.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     DAILY_WITHDRAW_LIMIT = float(os.getenv('DAILY_WITHDRAW_LIMIT', '25000'))
+    # Bounded retries (with jittered exponential backoff) when the guarded balance UPDATE loses a race
+    TX_CONFLICT_RETRIES = int(os.getenv('TX_CONFLICT_RETRIES', '3'))
+    TX_RETRY_BACKOFF_MS = float(os.getenv('TX_RETRY_BACKOFF_MS', '5'))
+    # Opt-in per-account write serialization (striped thread locks + cross-worker file locks)
+    ACCOUNT_LOCKS_ENABLED = os.getenv('ACCOUNT_LOCKS_ENABLED', 'false').lower() == 'true'
+    ACCOUNT_LOCK_STRIPES = int(os.getenv('ACCOUNT_LOCK_STRIPES', '64'))
+    ACCOUNT_LOCK_TIMEOUT = float(os.getenv('ACCOUNT_LOCK_TIMEOUT', '5'))
+    ACCOUNT_LOCK_DIR = os.getenv('ACCOUNT_LOCK_DIR', '')
+    PAGINATION_MAX_LIMIT = int(os.getenv('PAGINATION_MAX_LIMIT', '100'))
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+    # Bump RECEIPT_TEMPLATE_VERSION whenever the receipt layout changes to invalidate cached PDFs
+    RECEIPT_TEMPLATE_VERSION = os.getenv('RECEIPT_TEMPLATE_VERSION', '2')
+    RECEIPT_PDF_CACHE_MAX_BYTES = int(os.getenv('RECEIPT_PDF_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+    RECEIPT_PDF_CACHE_MAX_DISK_BYTES = int(os.getenv('RECEIPT_PDF_CACHE_MAX_DISK_BYTES', str(512 * 1024 * 1024)))
+    RECEIPT_PDF_CACHE_DIR = os.getenv('RECEIPT_PDF_CACHE_DIR', '')
+    RECEIPT_PDF_MAX_AGE = int(os.getenv('RECEIPT_PDF_MAX_AGE', '86400'))
+    # Receipt rendering process pool; 0 renders inline in the request thread (tests, single-core boxes)
+    PDF_RENDER_WORKERS = int(os.getenv('PDF_RENDER_WORKERS', str(min(os.cpu_count() or 1, 2))))
+    PDF_RENDER_MAX_PENDING = int(os.getenv('PDF_RENDER_MAX_PENDING', '64'))
+    PDF_RENDER_TIMEOUT = float(os.getenv('PDF_RENDER_TIMEOUT', '10'))
+    STATEMENT_MAX_DAYS = int(os.getenv('STATEMENT_MAX_DAYS', '366'))
+    # Werkzeug hash method/work factor for PINs, e.g. pbkdf2:sha256:600000; older hashes are
+    # upgraded on the next successful login. Hashing runs in PIN_HASH_WORKERS processes
+    # (0 = inline in the request thread, for tests and single-core boxes)
+    PIN_HASH_METHOD = os.getenv('PIN_HASH_METHOD', 'scrypt:32768:8:1')
+    PIN_HASH_WORKERS = int(os.getenv('PIN_HASH_WORKERS', str(min(os.cpu_count() or 1, 2))))
+    PIN_HASH_MAX_PENDING = int(os.getenv('PIN_HASH_MAX_PENDING', '32'))
+    PIN_HASH_TIMEOUT = float(os.getenv('PIN_HASH_TIMEOUT', '10'))
+    # Refresh-token revocations: shared table plus per-expiry-day mmap'd bloom filters
+    REVOCATION_BLOOM_DIR = os.getenv('REVOCATION_BLOOM_DIR', '')
+    REVOCATION_BLOOM_BYTES = int(os.getenv('REVOCATION_BLOOM_BYTES', str(1 << 20)))
+    REVOCATION_PURGE_INTERVAL = int(os.getenv('REVOCATION_PURGE_INTERVAL', '600'))
+    # Reverse proxies in front of the app (nginx in docker-compose = 1); 0 trusts no X-Forwarded-For
+    TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '0'))
+    # Login throttling: sliding-window limits per client IP and account number, lockout
+    # after repeated wrong PINs, and a short negative cache for unknown account numbers
+    LOGIN_THROTTLE_ENABLED = os.getenv('LOGIN_THROTTLE_ENABLED', 'true').lower() == 'true'
+    LOGIN_THROTTLE_DB = os.getenv('LOGIN_THROTTLE_DB', '')
+    LOGIN_THROTTLE_WINDOW = int(os.getenv('LOGIN_THROTTLE_WINDOW', '60'))
+    LOGIN_THROTTLE_IP_LIMIT = int(os.getenv('LOGIN_THROTTLE_IP_LIMIT', '120'))
+    LOGIN_THROTTLE_ACCOUNT_LIMIT = int(os.getenv('LOGIN_THROTTLE_ACCOUNT_LIMIT', '20'))
+    LOGIN_LOCKOUT_FAILURES = int(os.getenv('LOGIN_LOCKOUT_FAILURES', '5'))
+    LOGIN_LOCKOUT_SECONDS = int(os.getenv('LOGIN_LOCKOUT_SECONDS', '900'))
+    LOGIN_NEGATIVE_CACHE_TTL = int(os.getenv('LOGIN_NEGATIVE_CACHE_TTL', '300'))
+    # /api/admin/stats: cap on buckets per call and on memoized completed buckets
+    STATS_MAX_BUCKETS = int(os.getenv('STATS_MAX_BUCKETS', '2000'))
+    STATS_CACHE_MAX_ENTRIES = int(os.getenv('STATS_CACHE_MAX_ENTRIES', '20000'))
+    # Bulk settlement ingestion: rows per chunk (one commit each) and where per-row results go
+    BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', '2000'))
+    BULK_RESULTS_DIR = os.getenv('BULK_RESULTS_DIR', '')
+    # Bulk user import: rows per chunk and PIN hashing processes (0 = inline)
+    BULK_IMPORT_CHUNK_SIZE = int(os.getenv('BULK_IMPORT_CHUNK_SIZE', '1000'))
+    BULK_PIN_HASH_WORKERS = int(os.getenv('BULK_PIN_HASH_WORKERS', str(os.cpu_count() or 1)))
+    # Optional read replica for GET requests; users who wrote within the lag window read the primary
+    READ_REPLICA_URI = os.getenv('READ_REPLICA_URI', '')
+    READ_REPLICA_LAG_SECONDS = float(os.getenv('READ_REPLICA_LAG_SECONDS', '5'))
+    READ_REPLICA_WRITES_FILE = os.getenv('READ_REPLICA_WRITES_FILE', '')
+    READ_REPLICA_WRITES_SLOTS = int(os.getenv('READ_REPLICA_WRITES_SLOTS', '65536'))
+    # SQLite production profile (see app/utils/sqlite_tuning.py); no effect on other databases
+    SQLITE_TUNING_ENABLED = os.getenv('SQLITE_TUNING_ENABLED', 'true').lower() == 'true'
+    SQLITE_WAL = os.getenv('SQLITE_WAL', 'true').lower() == 'true'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+    # negative = KiB, as in PRAGMA cache_size
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))
+    SQLITE_BEGIN_IMMEDIATE = os.getenv('SQLITE_BEGIN_IMMEDIATE', 'true').lower() == 'true'
+    # Prometheus /metrics; each worker writes its counters to METRICS_DIR for aggregation
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR = os.getenv('METRICS_DIR', '')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+    # Opt-in cProfile per request (PROFILE_HEADER present, or a PROFILE_SAMPLE_RATE sample),
+    # written to PROFILE_DIR/<correlation id>.prof
+    PROFILE_ENABLED = os.getenv('PROFILE_ENABLED', 'false').lower() == 'true'
+    PROFILE_HEADER = os.getenv('PROFILE_HEADER', 'X-Profile')
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+    PROFILE_DIR = os.getenv('PROFILE_DIR', '')
+    # Log statements slower than this (ms) to the flask_backend.slow_query logger; 0 = off
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '0'))
+    # Opt-in: bound parameters include PIN hashes, refresh-token JTIs and account numbers
+    SLOW_QUERY_LOG_PARAMETERS = os.getenv('SLOW_QUERY_LOG_PARAMETERS', 'false').lower() == 'true'
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:8081,http://localhost:5173').split(',')
-    JWT_PRIVATE_KEY_PATH = os.getenv('JWT_PRIVATE_KEY_PATH', 'flask_backend/keys/jwtRS256.key')
-    JWT_PUBLIC_KEY_PATH = os.getenv('JWT_PUBLIC_KEY_PATH', 'flask_backend/keys/jwtRS256.key.pub')
+    # RS256, ES256 or EdDSA; ES256/EdDSA sign far cheaper than RSA-2048
+    JWT_ALGORITHM = os.getenv('JWT_ALGORITHM', 'RS256')
+    JWT_PRIVATE_KEY_PATH = os.getenv('JWT_PRIVATE_KEY_PATH', os.path.join(PACKAGE_DIR, 'keys', f'jwt{JWT_ALGORITHM}.key'))
+    JWT_PUBLIC_KEY_PATH = os.getenv('JWT_PUBLIC_KEY_PATH', os.path.join(PACKAGE_DIR, 'keys', f'jwt{JWT_ALGORITHM}.key.pub'))
+    # Previous public keys still accepted for verification during a key rotation (comma-separated)
+    JWT_VERIFY_PUBLIC_KEY_PATHS = os.getenv('JWT_VERIFY_PUBLIC_KEY_PATHS', '')
+    JWT_KEY_RELOAD_INTERVAL = float(os.getenv('JWT_KEY_RELOAD_INTERVAL', '5'))
+    JWT_VERIFY_CACHE_SIZE = int(os.getenv('JWT_VERIFY_CACHE_SIZE', '4096'))
+    JWT_JWKS_MAX_AGE = int(os.getenv('JWT_JWKS_MAX_AGE', '300'))
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('JWT_ACCESS_TOKEN_EXPIRE_MINUTES', '15'))
     JWT_REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv('JWT_REFRESH_TOKEN_EXPIRE_DAYS', '7'))
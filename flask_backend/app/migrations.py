@@ -0,0 +1,21 @@
+from typing import List
+from sqlalchemy import inspect
+from flask_backend.app import db
+
+# create_all() never touches tables that already exist, so bring older
+# databases up to date by adding whatever tables and indexes they lack
+def upgrade_schema(engine=None) -> List[str]:
+    engine = engine or db.engine
+    applied = []
+    for table in db.metadata.sorted_tables:
+        inspector = inspect(engine)
+        if not inspector.has_table(table.name):
+            table.create(engine)
+            applied.append(f'table {table.name}')
+            continue
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if index.name not in existing:
+                index.create(engine)
+                applied.append(f'index {index.name}')
+    return applied
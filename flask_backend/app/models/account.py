@@ -13,3 +13,8 @@ class Account(db.Model):
     version = db.Column(db.Integer, default=0, nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
 
+    __table_args__ = (
+        db.Index('ix_accounts_user_id', 'user_id'),
+        db.Index('ix_accounts_created_at_id', 'created_at', 'id'),
+    )
+
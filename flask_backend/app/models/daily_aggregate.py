@@ -0,0 +1,16 @@
+from flask_backend.app import db
+
+# Per-account, per-day, per-type totals, bumped in the same database transaction
+# as every insert into transactions (see aggregate_service.bump_daily_aggregate)
+class DailyAggregate(db.Model):
+    __tablename__ = 'daily_aggregates'
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    type = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        # admin summaries read a date range across all accounts
+        db.Index('ix_daily_aggregates_day_type', 'day', 'type'),
+    )
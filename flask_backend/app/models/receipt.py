@@ -8,3 +8,10 @@ class Receipt(db.Model):
     content = db.Column(db.Text)
     created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
 
+    # fetch the server-side created_at with the INSERT (RETURNING) instead of a later SELECT
+    __mapper_args__ = {'eager_defaults': True}
+
+    __table_args__ = (
+        db.Index('ix_receipts_transaction_id', 'transaction_id'),
+        db.Index('ix_receipts_created_at_id', 'created_at', 'id'),
+    )
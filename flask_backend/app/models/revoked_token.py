@@ -0,0 +1,11 @@
+from flask_backend.app import db
+
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_tokens'
+    jti = db.Column(db.String(64), primary_key=True)
+    # epoch seconds of the token's own exp; the row is useless after that
+    expires_at = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_revoked_tokens_expires_at', 'expires_at'),
+    )
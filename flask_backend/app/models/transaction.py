@@ -10,3 +10,11 @@ class Transaction(db.Model):
     description = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
 
+    # fetch the server-side created_at with the INSERT (RETURNING) instead of a later SELECT
+    __mapper_args__ = {'eager_defaults': True}
+
+    __table_args__ = (
+        # per-account history, newest first
+        db.Index('ix_transactions_account_id_created_at', 'account_id', 'created_at', 'id'),
+        db.Index('ix_transactions_created_at_id', 'created_at', 'id'),
+    )
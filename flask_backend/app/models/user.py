@@ -8,3 +8,7 @@ class User(db.Model):
     phone = db.Column(db.String(15), nullable=False)
     role = db.Column(db.String(20), default='user', nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+
+    __table_args__ = (
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
@@ -1,21 +1,44 @@
-from flask import Blueprint, request, jsonify, current_app
-from flask_backend.app.utils.jwt_utils import verify_token
-from flask_backend.app.models.account import Account
+from datetime import date, timedelta
+from flask import Blueprint, Response, jsonify, g, current_app, stream_with_context
+from werkzeug.exceptions import BadRequest
+from flask_backend.app import db
+from flask_backend.app.models.transaction import Transaction
+from flask_backend.app.services.pdf_service import render_statement
+from flask_backend.app.utils.auth_utils import login_required
+from flask_backend.app.utils.query_filters import parse_date_arg, created_between
 
 bp = Blueprint('account', __name__, url_prefix='/api/account')
 
-@bp.route('/balance', methods=['GET'])
-def balance():
-    auth = request.headers.get('Authorization', '')
-    token = auth.replace('Bearer ', '')
-    payload = verify_token(current_app.config, token)
-    if not payload or payload.get('type') != 'access':
-        return jsonify({'success': False, 'message': 'Invalid token'}), 401
-    user_id = int(payload.get('sub'))
-    account = Account.query.filter_by(user_id=user_id).first()
-    return jsonify({
+def balance_body(account):
+    return {
         'balance': float(account.balance),
         'daily_limit': float(account.daily_limit),
         'daily_withdrawn': float(account.daily_withdrawn)
-    })
+    }
 
+@bp.route('/balance', methods=['GET'])
+@login_required
+def balance():
+    return jsonify(balance_body(g.identity.account))
+
+@bp.route('/statement/pdf', methods=['GET'])
+@login_required
+def statement_pdf():
+    user, account = g.identity.user, g.identity.account
+    end = parse_date_arg('to') or date.today()
+    start = parse_date_arg('from') or end - timedelta(days=30)
+    if start > end:
+        raise BadRequest('from must not be after to')
+    if (end - start).days > int(current_app.config.get('STATEMENT_MAX_DAYS', 366)):
+        raise BadRequest('Statement period too long')
+    query = db.session.query(Transaction.created_at, Transaction.type, Transaction.description, Transaction.amount, Transaction.balance_after).filter(Transaction.account_id == account.id)
+    query = created_between(query, Transaction.created_at, start, end)
+    rows = query.order_by(Transaction.created_at, Transaction.id).execution_options(yield_per=int(current_app.config.get('EXPORT_BATCH_SIZE', 1000)))
+    header = {
+        'account': f"****{account.account_number[-4:]}",
+        'name': user.name,
+        'period': f"{start.isoformat()} to {end.isoformat()}",
+    }
+    return Response(stream_with_context(render_statement(header, rows)), mimetype='application/pdf', headers={
+        'Content-Disposition': f'attachment; filename=statement-{start.isoformat()}-{end.isoformat()}.pdf'
+    })
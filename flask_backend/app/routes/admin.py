@@ -1,5 +1,17 @@
-from flask import Blueprint, request, jsonify, current_app
-from flask_backend.app.utils.jwt_utils import verify_token
+import csv
+import io
+import json
+import os
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, jsonify, request, send_file, stream_with_context, current_app
+from werkzeug.exceptions import BadRequest, NotFound
+from flask_backend.app import db
+from flask_backend.app.utils.auth_utils import login_required
+from flask_backend.app.utils.pagination import keyset_page, paginated_response
+from flask_backend.app.utils.query_filters import parse_date_arg, created_between
+from flask_backend.app.services.aggregate_service import daily_summary
+from flask_backend.app.services.stats_service import BUCKETS, StatsCache, bucketed_stats
+from flask_backend.app.services.bulk_service import BULK_FORMATS, import_users, ingest_transactions, results_dir, text_stream
 from flask_backend.app.models.user import User
 from flask_backend.app.models.account import Account
 from flask_backend.app.models.transaction import Transaction
@@ -7,25 +19,13 @@ from flask_backend.app.models.receipt import Receipt
 
 bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
-def _auth():
-    auth = request.headers.get('Authorization', '')
-    token = auth.replace('Bearer ', '')
-    payload = verify_token(current_app.config, token)
-    if not payload or payload.get('type') != 'access':
-        return None
-    return payload
+admin_required = login_required(require_account=False, role='admin')
 
 @bp.route('/users', methods=['GET'])
+@admin_required
 def list_users():
-    payload = _auth()
-    if not payload:
-        return jsonify({'success': False, 'message': 'Invalid token'}), 401
-    if payload.get('role') != 'admin':
-        return jsonify({'success': False, 'message': 'Forbidden'}), 403
-    limit = int(request.args.get('limit', '20'))
-    offset = int(request.args.get('offset', '0'))
-    users = User.query.order_by(User.created_at.desc()).offset(offset).limit(limit).all()
-    return jsonify([
+    users, next_cursor = keyset_page(User.query, User)
+    return paginated_response([
         {
             'id': u.id,
             'name': u.name,
@@ -33,19 +33,13 @@ def list_users():
             'phone': u.phone,
             'created_at': str(u.created_at)
         } for u in users
-    ])
+    ], next_cursor)
 
 @bp.route('/accounts', methods=['GET'])
+@admin_required
 def list_accounts():
-    payload = _auth()
-    if not payload:
-        return jsonify({'success': False, 'message': 'Invalid token'}), 401
-    if payload.get('role') != 'admin':
-        return jsonify({'success': False, 'message': 'Forbidden'}), 403
-    limit = int(request.args.get('limit', '20'))
-    offset = int(request.args.get('offset', '0'))
-    accs = Account.query.order_by(Account.created_at.desc()).offset(offset).limit(limit).all()
-    return jsonify([
+    accs, next_cursor = keyset_page(Account.query, Account)
+    return paginated_response([
         {
             'id': a.id,
             'user_id': a.user_id,
@@ -55,19 +49,13 @@ def list_accounts():
             'daily_withdrawn': float(a.daily_withdrawn),
             'created_at': str(a.created_at)
         } for a in accs
-    ])
+    ], next_cursor)
 
 @bp.route('/transactions', methods=['GET'])
+@admin_required
 def list_transactions():
-    payload = _auth()
-    if not payload:
-        return jsonify({'success': False, 'message': 'Invalid token'}), 401
-    if payload.get('role') != 'admin':
-        return jsonify({'success': False, 'message': 'Forbidden'}), 403
-    limit = int(request.args.get('limit', '20'))
-    offset = int(request.args.get('offset', '0'))
-    txs = Transaction.query.order_by(Transaction.created_at.desc()).offset(offset).limit(limit).all()
-    return jsonify([
+    txs, next_cursor = keyset_page(Transaction.query, Transaction)
+    return paginated_response([
         {
             'id': t.id,
             'account_id': t.account_id,
@@ -77,23 +65,140 @@ def list_transactions():
             'description': t.description,
             'created_at': str(t.created_at)
         } for t in txs
-    ])
+    ], next_cursor)
+
+EXPORT_COLUMNS = ('id', 'account_id', 'type', 'amount', 'balance_after', 'description', 'created_at')
+
+@bp.route('/transactions/export', methods=['GET'])
+@admin_required
+def export_transactions():
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        raise BadRequest('format must be ndjson or csv')
+    query = db.session.query(*(getattr(Transaction, c) for c in EXPORT_COLUMNS))
+    query = created_between(query, Transaction.created_at, parse_date_arg('from'), parse_date_arg('to'))
+    if request.args.get('type'):
+        query = query.filter(Transaction.type == request.args['type'])
+    if request.args.get('account_id'):
+        try:
+            query = query.filter(Transaction.account_id == int(request.args['account_id']))
+        except ValueError:
+            raise BadRequest('Invalid account_id')
+    batch = int(current_app.config.get('EXPORT_BATCH_SIZE', 1000))
+    # server-side cursor: rows are fetched and written batch by batch, never all at once
+    rows = query.order_by(Transaction.created_at, Transaction.id).execution_options(yield_per=batch)
+
+    def generate():
+        buf = io.StringIO()
+        writer = csv.writer(buf) if fmt == 'csv' else None
+        if writer:
+            writer.writerow(EXPORT_COLUMNS)
+        pending = 0
+        for row in rows:
+            record = (row.id, row.account_id, row.type, float(row.amount), float(row.balance_after), row.description, str(row.created_at))
+            if writer:
+                writer.writerow(record)
+            else:
+                buf.write(json.dumps(dict(zip(EXPORT_COLUMNS, record)), separators=(',', ':')))
+                buf.write('\n')
+            pending += 1
+            if pending >= batch:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+                pending = 0
+        yield buf.getvalue()
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=transactions.{fmt}'
+    })
 
 @bp.route('/receipts', methods=['GET'])
+@admin_required
 def list_receipts():
-    payload = _auth()
-    if not payload:
-        return jsonify({'success': False, 'message': 'Invalid token'}), 401
-    if payload.get('role') != 'admin':
-        return jsonify({'success': False, 'message': 'Forbidden'}), 403
-    limit = int(request.args.get('limit', '20'))
-    offset = int(request.args.get('offset', '0'))
-    recs = Receipt.query.order_by(Receipt.created_at.desc()).offset(offset).limit(limit).all()
-    return jsonify([
+    recs, next_cursor = keyset_page(Receipt.query, Receipt)
+    return paginated_response([
         {
             'id': r.id,
             'transaction_id': r.transaction_id,
             'receipt_number': r.receipt_number,
             'created_at': str(r.created_at)
         } for r in recs
-    ])
+    ], next_cursor)
+
+@bp.route('/summary', methods=['GET'])
+@admin_required
+def summary():
+    # transactions.created_at is stamped by the database in UTC
+    end = parse_date_arg('to') or datetime.utcnow().date()
+    start = parse_date_arg('from') or end - timedelta(days=30)
+    if start > end:
+        raise BadRequest('from must not be after to')
+    if (end - start).days > int(current_app.config.get('STATEMENT_MAX_DAYS', 366)):
+        raise BadRequest('Summary period too long')
+    account_id = None
+    if request.args.get('account_id'):
+        try:
+            account_id = int(request.args['account_id'])
+        except ValueError:
+            raise BadRequest('Invalid account_id')
+    result = daily_summary(start, end, account_id)
+    return jsonify({'success': True, 'from': start.isoformat(), 'to': end.isoformat(), **result})
+
+_STATS_DEFAULT_SPAN = {'hour': timedelta(days=1), 'day': timedelta(days=30), 'week': timedelta(weeks=12)}
+
+@bp.route('/stats', methods=['GET'])
+@admin_required
+def stats():
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in BUCKETS:
+        raise BadRequest('bucket must be hour, day or week')
+    now = datetime.utcnow()
+    last = parse_date_arg('to') or now.date()
+    first = parse_date_arg('from') or last - _STATS_DEFAULT_SPAN[bucket] + timedelta(days=1)
+    if first > last:
+        raise BadRequest('from must not be after to')
+    start = datetime(first.year, first.month, first.day)
+    end = datetime(last.year, last.month, last.day) + timedelta(days=1)
+    step = {'hour': 3600, 'day': 86400, 'week': 7 * 86400}[bucket]
+    if (end - start).total_seconds() / step > int(current_app.config.get('STATS_MAX_BUCKETS', 2000)):
+        raise BadRequest('Too many buckets, narrow the range')
+    cache = current_app.extensions.get('admin_stats_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault('admin_stats_cache', StatsCache(current_app.config.get('STATS_CACHE_MAX_ENTRIES', 20000)))
+    buckets = bucketed_stats(cache, bucket, start, end, now)
+    return jsonify({'success': True, 'bucket': bucket, 'from': first.isoformat(), 'to': last.isoformat(), 'buckets': buckets})
+
+@bp.route('/transactions/bulk', methods=['POST'])
+@admin_required
+def bulk_transactions():
+    # body is the raw CSV or NDJSON batch; it is parsed as it streams in
+    fmt = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+    if fmt not in BULK_FORMATS:
+        raise BadRequest('format must be csv or ndjson')
+    summary = ingest_transactions(text_stream(request.stream), fmt)
+    summary['result_file'] = os.path.basename(summary['result_file'])
+    return jsonify({'success': True, **summary})
+
+@bp.route('/users/bulk', methods=['POST'])
+@admin_required
+def bulk_users():
+    # CSV with name,email,phone,account_number,pin columns (or NDJSON with the same keys)
+    fmt = request.args.get('format') or ('ndjson' if request.mimetype == 'application/x-ndjson' else 'csv')
+    if fmt not in BULK_FORMATS:
+        raise BadRequest('format must be csv or ndjson')
+    summary = import_users(text_stream(request.stream), fmt)
+    summary['result_file'] = os.path.basename(summary['result_file'])
+    return jsonify({'success': True, **summary})
+
+@bp.route('/transactions/bulk/<batch_id>', methods=['GET'])
+@bp.route('/users/bulk/<batch_id>', methods=['GET'])
+@admin_required
+def bulk_result(batch_id):
+    if not batch_id.isalnum():
+        raise NotFound()
+    path = os.path.join(results_dir(), f'{batch_id}.ndjson')
+    if not os.path.exists(path):
+        raise NotFound()
+    return send_file(path, mimetype='application/x-ndjson', as_attachment=True, download_name=f'{batch_id}.ndjson')
@@ -1,10 +1,12 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g
 from werkzeug.security import generate_password_hash
-from flask_backend.app.services.auth_service import find_account_by_number, verify_pin, change_pin
-from flask_backend.app.utils.jwt_utils import create_access_token, create_refresh_token, verify_token
+from flask_backend.app.services.auth_service import find_account_by_number, verify_pin, change_pin, upgrade_pin_hash
+from flask_backend.app.services.revocation_service import revoke_token, is_token_revoked
+from flask_backend.app.utils.worker_pool import WorkerPoolBusy
+from flask_backend.app.utils.login_throttle import login_throttle, Throttled
+from flask_backend.app.utils.jwt_utils import create_access_token, create_refresh_token, verify_token, jwks, evict_token
+from flask_backend.app.utils.auth_utils import bearer_token, current_identity, login_required
 from flask_backend.app import db
-from flask_backend.app.models.user import User
-from flask_backend.app.models.account import Account
 from marshmallow import ValidationError
 from flask_backend.app.schemas import LoginSchema, ChangePinSchema
 
@@ -20,12 +22,32 @@ def login():
     account_number = payload['account_number']
     pin = payload['pin']
 
+    throttle = login_throttle()
+    if throttle is not None:
+        try:
+            throttle.admit(request.remote_addr, account_number)
+        except Throttled as t:
+            resp = jsonify({'success': False, 'message': t.message})
+            if t.status != 401:
+                resp.headers['Retry-After'] = str(t.retry_after)
+            return resp, t.status
+
     record = find_account_by_number(account_number)
     if not record:
+        if throttle is not None:
+            throttle.account_not_found(account_number)
         return jsonify({'success': False, 'message': 'Account not found'}), 401
     user, account = record
-    if not verify_pin(account, pin):
-        return jsonify({'success': False, 'message': 'Invalid PIN'}), 401
+    try:
+        if not verify_pin(account, pin):
+            if throttle is not None and throttle.pin_failed(account_number):
+                return jsonify({'success': False, 'message': 'Account temporarily locked'}), 423
+            return jsonify({'success': False, 'message': 'Invalid PIN'}), 401
+        upgrade_pin_hash(account, pin)
+    except WorkerPoolBusy:
+        return jsonify({'success': False, 'message': 'Service busy, please retry'}), 503
+    if throttle is not None:
+        throttle.pin_succeeded(account_number)
 
     token = create_access_token(current_app.config, user.id, role=user.role)
     refresh = create_refresh_token(current_app.config, user.id)
@@ -52,19 +74,16 @@ def login():
         }
     })
 
-@bp.route('/validate', methods=['GET'])
-def validate():
-    auth = request.headers.get('Authorization', '')
-    token = auth.replace('Bearer ', '')
-    payload = verify_token(current_app.config, token)
-    if not payload or payload.get('type') != 'access':
-        return jsonify({'success': False, 'message': 'Invalid token'}), 401
-    user_id = int(payload.get('sub'))
-    user = User.query.get(user_id)
-    account = Account.query.filter_by(user_id=user_id).first()
-    if not user or not account:
-        return jsonify({'success': False, 'message': 'Session invalid'}), 401
-    return jsonify({
+@bp.route('/.well-known/jwks.json', methods=['GET'])
+def jwks_document():
+    resp = jsonify(jwks(current_app.config))
+    resp.cache_control.public = True
+    resp.cache_control.max_age = int(current_app.config.get('JWT_JWKS_MAX_AGE', 300))
+    resp.add_etag()
+    return resp.make_conditional(request)
+
+def validate_body(user, account):
+    return {
         'success': True,
         'user': {
             'id': user.id,
@@ -82,46 +101,43 @@ def validate():
             'daily_withdrawn': float(account.daily_withdrawn),
             'created_at': str(account.created_at)
         }
-    })
+    }
+
+@bp.route('/validate', methods=['GET'])
+@login_required
+def validate():
+    return jsonify(validate_body(g.identity.user, g.identity.account))
 
 @bp.route('/logout', methods=['POST'])
 def logout():
     # Revoke refresh token if provided
-    auth = request.headers.get('Authorization', '')
-    token = auth.replace('Bearer ', '')
-    payload = verify_token(current_app.config, token)
+    token = bearer_token()
+    payload = verify_token(current_app.config, token) if token else None
     if payload and payload.get('type') == 'refresh':
-        revoked = current_app.config.setdefault('REVOKED_REFRESH_JTIS', set())
-        revoked.add(payload.get('jti'))
+        revoke_token(payload)
+        evict_token(token)
     return jsonify({'success': True})
 
 @bp.route('/refresh', methods=['POST'])
 def refresh():
-    auth = request.headers.get('Authorization', '')
-    token = auth.replace('Bearer ', '')
-    payload = verify_token(current_app.config, token)
+    token = bearer_token()
+    payload = verify_token(current_app.config, token) if token else None
     if not payload or payload.get('type') != 'refresh':
         return jsonify({'success': False, 'message': 'Invalid token'}), 401
-    revoked = current_app.config.setdefault('REVOKED_REFRESH_JTIS', set())
-    if payload.get('jti') in revoked:
+    if is_token_revoked(payload):
         return jsonify({'success': False, 'message': 'Token revoked'}), 401
-    user_id = int(payload.get('sub'))
-    user = User.query.get(user_id)
-    if not user:
+    identity = current_identity(token_type='refresh')
+    if identity is None:
         return jsonify({'success': False, 'message': 'User not found'}), 404
+    user = identity.user
     new_access = create_access_token(current_app.config, user.id, role=user.role)
     new_refresh = create_refresh_token(current_app.config, user.id)
     return jsonify({'success': True, 'token': new_access, 'refresh_token': new_refresh})
 
 @bp.route('/change-pin', methods=['POST'])
+@login_required
 def change_pin_route():
-    auth = request.headers.get('Authorization', '')
-    token = auth.replace('Bearer ', '')
-    payload = verify_token(current_app.config, token)
-    if not payload or payload.get('type') != 'access':
-        return jsonify({'success': False, 'message': 'Invalid token'}), 401
-    user_id = int(payload.get('sub'))
-    account = Account.query.filter_by(user_id=user_id).first()
+    account = g.identity.account
     data = request.get_json(force=True) or {}
     try:
         payload = ChangePinSchema().load(data)
@@ -129,7 +145,10 @@ def change_pin_route():
         return jsonify({'success': False, 'message': 'Validation error', 'details': ve.messages}), 400
     current_pin = payload['current_pin']
     new_pin = payload['new_pin']
-    ok = change_pin(account, current_pin, new_pin)
+    try:
+        ok = change_pin(account, current_pin, new_pin)
+    except WorkerPoolBusy:
+        return jsonify({'success': False, 'message': 'Service busy, please retry'}), 503
     if not ok:
         return jsonify({'success': False, 'message': 'Current PIN incorrect'}), 401
     return jsonify({'success': True})
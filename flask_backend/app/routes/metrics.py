@@ -0,0 +1,8 @@
+from flask import Blueprint, Response
+from flask_backend.app.utils.metrics import render_metrics
+
+bp = Blueprint('metrics', __name__)
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -1,83 +1,62 @@
-from flask import Blueprint, request, current_app, Response
-from flask_backend.app.utils.jwt_utils import verify_token
+from flask import Blueprint, Response, request, current_app
+from flask_backend.app import db
+from flask_backend.app.utils.auth_utils import current_identity
+from flask_backend.app.utils.pdf_cache import receipt_cache_key, receipt_pdf_cache
 from flask_backend.app.models.receipt import Receipt
 from flask_backend.app.models.transaction import Transaction
 from flask_backend.app.models.account import Account
 from flask_backend.app.models.user import User
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from io import BytesIO
-from datetime import datetime
+from flask_backend.app.services.pdf_service import receipt_fields, render_receipt
+from flask_backend.app.utils.worker_pool import get_pool, WorkerPoolBusy
 
 bp = Blueprint('receipts_pdf', __name__, url_prefix='/api/receipts')
 
-def _auth():
-    auth = request.headers.get('Authorization', '')
-    token = auth.replace('Bearer ', '')
-    payload = verify_token(current_app.config, token)
-    if not payload or payload.get('type') != 'access':
-        return None
-    return payload
-
 @bp.route('/<int:receipt_id>/pdf', methods=['GET'])
 def receipt_pdf(receipt_id: int):
-    payload = _auth()
-    if not payload:
+    if current_identity() is None:
         return Response('Unauthorized', status=401)
 
-    rec = Receipt.query.get(receipt_id)
+    rec = db.session.get(Receipt, receipt_id)
     if not rec:
         return Response('Not Found', status=404)
+    return _receipt_response(rec)
 
-    tx = Transaction.query.get(rec.transaction_id)
-    acc = Account.query.get(tx.account_id) if tx else None
-    usr = User.query.get(acc.user_id) if acc else None
-    if not tx or not acc or not usr:
-        return Response('Not Found', status=404)
-
-    buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
-    width, height = A4
-
-    y = height - 50
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(50, y, "ATM SIMULATOR – Transaction Receipt")
-    y -= 30
-    c.setFont("Helvetica", 11)
-    c.drawString(50, y, f"Receipt No: {rec.receipt_number}")
-    y -= 18
-    c.drawString(50, y, f"Date: {tx.created_at.strftime('%Y-%m-%d %H:%M:%S')}")
-    y -= 18
-    masked = f"****{acc.account_number[-4:]}"
-    c.drawString(50, y, f"Account: {masked}")
-    y -= 18
-    c.drawString(50, y, f"Name: {usr.name}")
-    y -= 18
-    c.drawString(50, y, f"Transaction: {tx.type.title()}")
-    y -= 18
-    c.drawString(50, y, f"Amount: ₹{float(tx.amount):,.2f}")
-    y -= 18
-    c.drawString(50, y, f"Balance After: ₹{float(tx.balance_after):,.2f}")
-    y -= 30
-    c.setFont("Helvetica-Oblique", 10)
-    c.drawString(50, y, "Thank you for banking with us. Please retain this receipt.")
+def _receipt_response(rec: Receipt) -> Response:
+    config = current_app.config
+    key = receipt_cache_key(rec.receipt_number, str(config.get('RECEIPT_TEMPLATE_VERSION', '2')))
+    etag = key[:32]
+    headers = {
+        'Content-Disposition': f'attachment; filename=receipt-{rec.receipt_number}.pdf',
+        'Cache-Control': f"private, max-age={int(config.get('RECEIPT_PDF_MAX_AGE', 86400))}, immutable",
+    }
+    if etag in request.if_none_match:
+        resp = Response(status=304, headers=headers)
+        resp.set_etag(etag)
+        return resp
 
-    c.showPage()
-    c.save()
-    pdf = buf.getvalue()
-    buf.close()
+    cache = receipt_pdf_cache(config, current_app.instance_path)
+    pdf = cache.get(key)
+    if pdf is None:
+        row = db.session.query(Transaction, Account, User).join(Account, Account.id == Transaction.account_id).join(User, User.id == Account.user_id).filter(Transaction.id == rec.transaction_id).first()
+        if not row:
+            return Response('Not Found', status=404)
+        pool = get_pool('pdf', config.get('PDF_RENDER_WORKERS', 0), config.get('PDF_RENDER_MAX_PENDING', 64))
+        try:
+            pdf = pool.run(render_receipt, receipt_fields(rec, *row), timeout=float(config.get('PDF_RENDER_TIMEOUT', 10)))
+        except WorkerPoolBusy:
+            return Response('Busy', status=503, headers={'Retry-After': '1'})
+        cache.put(key, pdf)
 
-    return Response(pdf, mimetype='application/pdf', headers={
-        'Content-Disposition': f'attachment; filename=receipt-{rec.receipt_number}.pdf'
-    })
+    resp = Response(pdf, mimetype='application/pdf', headers=headers)
+    resp.set_etag(etag)
+    return resp
 
 @bp.route('/latest/pdf', methods=['GET'])
 def latest_receipt_pdf():
-    payload = _auth()
-    if not payload:
+    identity = current_identity()
+    if identity is None:
         return Response('Unauthorized', status=401)
-    user_id = int(payload.get('sub'))
-    acc = Account.query.filter_by(user_id=user_id).first()
+    acc = identity.account
     if not acc:
         return Response('Not Found', status=404)
     tx = Transaction.query.filter_by(account_id=acc.id).order_by(Transaction.created_at.desc()).first()
@@ -86,6 +65,4 @@ def latest_receipt_pdf():
     rec = Receipt.query.filter_by(transaction_id=tx.id).first()
     if not rec:
         return Response('Not Found', status=404)
-    # Reuse generation
-    with current_app.test_request_context():
-        return receipt_pdf(rec.id)
+    return _receipt_response(rec)
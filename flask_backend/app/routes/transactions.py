@@ -1,7 +1,7 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, g
 from decimal import Decimal
-from flask_backend.app.utils.jwt_utils import verify_token
-from flask_backend.app.models.account import Account
+from flask_backend.app.utils.auth_utils import login_required
+from flask_backend.app.utils.pagination import keyset_page, paginated_response
 from flask_backend.app.services.transaction_service import withdraw as do_withdraw, deposit as do_deposit
 from flask_backend.app.models.transaction import Transaction
 from marshmallow import ValidationError
@@ -9,15 +9,32 @@ from flask_backend.app.schemas import AmountSchema
 
 bp = Blueprint('transactions', __name__, url_prefix='/api/transactions')
 
+def transaction_body(tx, receipt):
+    return {
+        'success': True,
+        'transaction': {
+            'id': tx.id,
+            'account_id': tx.account_id,
+            'type': tx.type,
+            'amount': float(tx.amount),
+            'balance_after': float(tx.balance_after),
+            'description': tx.description,
+            'created_at': str(tx.created_at)
+        },
+        'receipt': {
+            'id': receipt.id,
+            'transaction_id': receipt.transaction_id,
+            'receipt_number': receipt.receipt_number,
+            'content': receipt.content,
+            'created_at': str(receipt.created_at)
+        },
+        'new_balance': float(tx.balance_after)
+    }
+
 @bp.route('/withdraw', methods=['POST'])
+@login_required
 def withdraw():
-    auth = request.headers.get('Authorization', '')
-    token = auth.replace('Bearer ', '')
-    payload = verify_token(current_app.config, token)
-    if not payload or payload.get('type') != 'access':
-        return jsonify({'success': False, 'message': 'Invalid token'}), 401
-    user_id = int(payload.get('sub'))
-    account = Account.query.filter_by(user_id=user_id).first()
+    account = g.identity.account
     data = request.get_json(force=True) or {}
     try:
         payload = AmountSchema().load(data)
@@ -26,26 +43,7 @@ def withdraw():
     amount = Decimal(str(payload['amount']))
     try:
         tx, receipt = do_withdraw(account, amount, daily_limit=Decimal(str(account.daily_limit)))
-        return jsonify({
-            'success': True,
-            'transaction': {
-                'id': tx.id,
-                'account_id': tx.account_id,
-                'type': tx.type,
-                'amount': float(tx.amount),
-                'balance_after': float(tx.balance_after),
-                'description': tx.description,
-                'created_at': str(tx.created_at)
-            },
-            'receipt': {
-                'id': receipt.id,
-                'transaction_id': receipt.transaction_id,
-                'receipt_number': receipt.receipt_number,
-                'content': receipt.content,
-                'created_at': str(receipt.created_at)
-            },
-            'new_balance': float(tx.balance_after)
-        })
+        return jsonify(transaction_body(tx, receipt))
     except ValueError as ve:
         return jsonify({'success': False, 'message': str(ve)}), 400
     except RuntimeError as re:
@@ -54,14 +52,9 @@ def withdraw():
         return jsonify({'success': False, 'message': msg}), code
 
 @bp.route('/deposit', methods=['POST'])
+@login_required
 def deposit():
-    auth = request.headers.get('Authorization', '')
-    token = auth.replace('Bearer ', '')
-    payload = verify_token(current_app.config, token)
-    if not payload or payload.get('type') != 'access':
-        return jsonify({'success': False, 'message': 'Invalid token'}), 401
-    user_id = int(payload.get('sub'))
-    account = Account.query.filter_by(user_id=user_id).first()
+    account = g.identity.account
     data = request.get_json(force=True) or {}
     try:
         payload = AmountSchema().load(data)
@@ -70,49 +63,30 @@ def deposit():
     amount = Decimal(str(payload['amount']))
     try:
         tx, receipt = do_deposit(account, amount)
-        return jsonify({
-            'success': True,
-            'transaction': {
-                'id': tx.id,
-                'account_id': tx.account_id,
-                'type': tx.type,
-                'amount': float(tx.amount),
-                'balance_after': float(tx.balance_after),
-                'description': tx.description,
-                'created_at': str(tx.created_at)
-            },
-            'receipt': {
-                'id': receipt.id,
-                'transaction_id': receipt.transaction_id,
-                'receipt_number': receipt.receipt_number,
-                'content': receipt.content,
-                'created_at': str(receipt.created_at)
-            },
-            'new_balance': float(tx.balance_after)
-        })
+        return jsonify(transaction_body(tx, receipt))
     except ValueError as ve:
         return jsonify({'success': False, 'message': str(ve)}), 400
+    except RuntimeError as re:
+        msg = str(re)
+        code = 409 if 'Concurrent' in msg else 403 if 'Daily limit' in msg else 400
+        return jsonify({'success': False, 'message': msg}), code
+
+HISTORY_DEFAULT_LIMIT = 10
+
+def history_item(t):
+    return {
+        'id': t.id,
+        'account_id': t.account_id,
+        'type': t.type,
+        'amount': float(t.amount),
+        'balance_after': float(t.balance_after),
+        'description': t.description,
+        'created_at': str(t.created_at)
+    }
 
 @bp.route('/history', methods=['GET'])
+@login_required
 def history():
-    auth = request.headers.get('Authorization', '')
-    token = auth.replace('Bearer ', '')
-    payload = verify_token(current_app.config, token)
-    if not payload or payload.get('type') != 'access':
-        return jsonify({'success': False, 'message': 'Invalid token'}), 401
-    user_id = int(payload.get('sub'))
-    account = Account.query.filter_by(user_id=user_id).first()
-    limit = int(request.args.get('limit', '10'))
-    txs = Transaction.query.filter_by(account_id=account.id).order_by(Transaction.created_at.desc()).limit(limit).all()
-    return jsonify([
-        {
-            'id': t.id,
-            'account_id': t.account_id,
-            'type': t.type,
-            'amount': float(t.amount),
-            'balance_after': float(t.balance_after),
-            'description': t.description,
-            'created_at': str(t.created_at)
-        }
-        for t in txs
-    ])
+    account = g.identity.account
+    txs, next_cursor = keyset_page(Transaction.query.filter_by(account_id=account.id), Transaction, default_limit=HISTORY_DEFAULT_LIMIT)
+    return paginated_response([history_item(t) for t in txs], next_cursor)
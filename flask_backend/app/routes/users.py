@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash
+from flask_backend.app.services.auth_service import hash_pin
+from flask_backend.app.utils.worker_pool import WorkerPoolBusy
+from flask_backend.app.utils.login_throttle import login_throttle
 from flask_backend.app.models.user import User
 from flask_backend.app.models.account import Account
 from flask_backend.app.utils.validators import is_valid_email, is_valid_phone
@@ -32,17 +34,25 @@ def register():
     if Account.query.filter_by(account_number=account_number).first():
         return jsonify({'success': False, 'message': 'Account number already exists'}), 409
 
+    try:
+        pin_hash = hash_pin(pin)
+    except WorkerPoolBusy:
+        return jsonify({'success': False, 'message': 'Service busy, please retry'}), 503
+
     user = User(name=name, email=email, phone=phone)
     db.session.add(user)
     db.session.flush()
     acc = Account(
         user_id=user.id,
         account_number=account_number,
-        pin_hash=generate_password_hash(pin),
+        pin_hash=pin_hash,
         balance=0.0
     )
     db.session.add(acc)
     db.session.commit()
+    throttle = login_throttle()
+    if throttle is not None:
+        throttle.account_created(account_number)
 
     return jsonify({
         'success': True,
@@ -0,0 +1,79 @@
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional
+from sqlalchemy import func, select, insert, update, delete
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from flask_backend.app import db
+from flask_backend.app.models.daily_aggregate import DailyAggregate
+from flask_backend.app.models.transaction import Transaction
+from flask_backend.app.utils.query_filters import created_between
+
+_KEY = ('account_id', 'day', 'type')
+
+def bump_daily_aggregate(tx: Transaction):
+    # Called inside the transaction that inserted tx (after flush, so created_at is known)
+    bump_daily_aggregates([{'account_id': tx.account_id, 'day': tx.created_at.date(), 'type': tx.type, 'count': 1, 'amount': tx.amount}])
+
+def bump_daily_aggregates(rows: List[Dict]):
+    # One upsert per (account_id, day, type) row, adding its count and amount, so
+    # concurrent writers for the same day never collide; bulk callers pass many rows
+    # and the upsert runs as a single executemany
+    if not rows:
+        return
+    table = DailyAggregate.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        stmt = (sqlite_insert if dialect == 'sqlite' else pg_insert)(table)
+        stmt = stmt.on_conflict_do_update(index_elements=list(_KEY), set_={
+            'count': table.c.count + stmt.excluded.count, 'amount': table.c.amount + stmt.excluded.amount})
+        db.session.execute(stmt, rows)
+    elif dialect in ('mysql', 'mariadb'):
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(count=table.c.count + stmt.inserted.count, amount=table.c.amount + stmt.inserted.amount)
+        db.session.execute(stmt, rows)
+    else:
+        for row in rows:
+            stmt = update(table).where(*(table.c[k] == row[k] for k in _KEY)).values(
+                count=table.c.count + row['count'], amount=table.c.amount + row['amount'])
+            if db.session.execute(stmt).rowcount == 0:
+                db.session.execute(insert(table).values(**row))
+
+def rebuild_daily_aggregates(start: Optional[date] = None, end: Optional[date] = None) -> int:
+    # Recompute the rollup from transactions for [start, end] (everything when
+    # omitted) in one database transaction; returns the number of rollup rows written
+    table = DailyAggregate.__table__
+    clear = delete(table)
+    if start:
+        clear = clear.where(table.c.day >= start)
+    if end:
+        clear = clear.where(table.c.day <= end)
+    day = func.date(Transaction.created_at)
+    source = db.session.query(Transaction.account_id, day, Transaction.type, func.count(), func.sum(Transaction.amount))
+    source = created_between(source, Transaction.created_at, start, end).group_by(Transaction.account_id, day, Transaction.type)
+    try:
+        db.session.execute(clear)
+        result = db.session.execute(insert(table).from_select(['account_id', 'day', 'type', 'count', 'amount'], source.statement))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result.rowcount
+
+def daily_summary(start: date, end: date, account_id: Optional[int] = None) -> Dict:
+    # reads only the rollup: cost depends on the number of days and types, not transactions
+    query = select(DailyAggregate.day, DailyAggregate.type, func.sum(DailyAggregate.count), func.sum(DailyAggregate.amount)).where(
+        DailyAggregate.day >= start, DailyAggregate.day <= end)
+    if account_id is not None:
+        query = query.where(DailyAggregate.account_id == account_id)
+    query = query.group_by(DailyAggregate.day, DailyAggregate.type).order_by(DailyAggregate.day, DailyAggregate.type)
+    days: List[Dict] = []
+    totals: Dict[str, Dict] = {}
+    for day, tx_type, count, amount in db.session.execute(query):
+        amount = float(amount or Decimal('0'))
+        days.append({'day': str(day), 'type': tx_type, 'count': int(count), 'amount': amount})
+        total = totals.setdefault(tx_type, {'count': 0, 'amount': 0.0})
+        total['count'] += int(count)
+        total['amount'] += amount
+    return {'days': days, 'totals': totals}
@@ -1,24 +1,71 @@
+from functools import lru_cache
+from flask import current_app
 from werkzeug.security import check_password_hash, generate_password_hash
 from flask_backend.app.models.user import User
 from flask_backend.app.models.account import Account
 from flask_backend.app import db
-from typing import Optional, Tuple
+from flask_backend.app.utils.worker_pool import get_pool
+from typing import List, Optional, Tuple
 
 def find_account_by_number(account_number: str) -> Optional[Tuple[User, Account]]:
-    account = Account.query.filter_by(account_number=account_number).first()
-    if not account:
+    row = db.session.query(User, Account).join(Account, Account.user_id == User.id).filter(Account.account_number == account_number).first()
+    if not row:
         return None
-    user = User.query.get(account.user_id)
-    return (user, account)
+    return (row[0], row[1])
+
+# PIN hashing is pure CPU, so it runs in a bounded process pool (PIN_HASH_WORKERS)
+# rather than on the request thread; a full queue raises WorkerPoolBusy
+def _pin_pool():
+    config = current_app.config
+    return get_pool('pin', config.get('PIN_HASH_WORKERS', 0), config.get('PIN_HASH_MAX_PENDING', 32))
+
+def _pin_method() -> str:
+    return current_app.config.get('PIN_HASH_METHOD') or 'scrypt:32768:8:1'
+
+def _timeout() -> float:
+    return float(current_app.config.get('PIN_HASH_TIMEOUT', 10))
+
+def _hash_pin(args: Tuple[str, str]) -> str:
+    pin, method = args
+    return generate_password_hash(pin, method=method)
+
+def _check_pin(args: Tuple[str, str]) -> bool:
+    pin_hash, pin = args
+    return check_password_hash(pin_hash, pin)
+
+@lru_cache(maxsize=8)
+def _normalized_method(method: str) -> str:
+    # werkzeug fills in defaults (e.g. pbkdf2 -> pbkdf2:sha256:600000); compare like with like
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+def hash_pin(pin: str) -> str:
+    return _pin_pool().run(_hash_pin, (pin, _pin_method()), timeout=_timeout())
+
+def hash_pins(pins: List[str], workers: Optional[int] = None) -> List[str]:
+    # batch callers (bulk imports) may ask for their own pool sized to the machine
+    method = _pin_method()
+    pool = _pin_pool() if workers is None else get_pool('pin-bulk', workers, 1)
+    return pool.map(_hash_pin, [(pin, method) for pin in pins], chunksize=64)
 
 def verify_pin(account: Account, pin: str) -> bool:
-    return check_password_hash(account.pin_hash, pin)
+    return _pin_pool().run(_check_pin, (account.pin_hash, pin), timeout=_timeout())
+
+def needs_rehash(pin_hash: str) -> bool:
+    return pin_hash.split('$', 1)[0] != _normalized_method(_pin_method())
+
+def upgrade_pin_hash(account: Account, pin: str) -> bool:
+    # call only after verify_pin succeeded: re-hash with the current work factor
+    if not needs_rehash(account.pin_hash):
+        return False
+    account.pin_hash = hash_pin(pin)
+    db.session.add(account)
+    db.session.commit()
+    return True
 
 def change_pin(account: Account, current_pin: str, new_pin: str) -> bool:
     if not verify_pin(account, current_pin):
         return False
-    account.pin_hash = generate_password_hash(new_pin)
+    account.pin_hash = hash_pin(new_pin)
     db.session.add(account)
     db.session.commit()
     return True
-
@@ -0,0 +1,325 @@
+import csv
+import io
+import json
+import os
+import uuid
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple
+from flask import current_app
+from marshmallow import ValidationError
+from sqlalchemy import bindparam, insert, literal, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+from flask_backend.app import db
+from flask_backend.app.models.account import Account
+from flask_backend.app.models.transaction import Transaction
+from flask_backend.app.models.receipt import Receipt
+from flask_backend.app.models.user import User
+from flask_backend.app.schemas import RegisterSchema
+from flask_backend.app.services.auth_service import hash_pins
+from flask_backend.app.utils.login_throttle import login_throttle
+from flask_backend.app.utils.validators import is_valid_email, is_valid_phone
+from flask_backend.app.services.aggregate_service import bump_daily_aggregates
+
+BULK_FORMATS = ('csv', 'ndjson')
+BULK_TYPES = ('deposit', 'withdrawal')
+_CENT = Decimal('0.01')
+
+def read_rows(stream: IO[str], fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    # yields (row number, fields or None, parse error or None) without reading the whole input
+    if fmt == 'csv':
+        for n, row in enumerate(csv.DictReader(stream), start=1):
+            yield n, row, None
+        return
+    n = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        n += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield n, None, 'Invalid JSON'
+            continue
+        yield (n, row, None) if isinstance(row, dict) else (n, None, 'Expected an object')
+
+def _validate(row: Dict) -> Tuple[Optional[Tuple[str, str, Decimal, str]], Optional[str]]:
+    # the same rules the single-operation endpoints apply through their schemas
+    number = str(row.get('account_number') or '').strip()
+    if not number.isdigit() or not 10 <= len(number) <= 16:
+        return None, 'Invalid account_number'
+    tx_type = str(row.get('type') or '').strip().lower()
+    if tx_type not in BULK_TYPES:
+        return None, 'type must be deposit or withdrawal'
+    try:
+        amount = Decimal(str(row.get('amount')).strip())
+    except (InvalidOperation, ValueError):
+        return None, 'Invalid amount'
+    if not amount.is_finite() or amount < _CENT or amount != amount.quantize(_CENT):
+        return None, 'Invalid amount'
+    description = str(row.get('description') or ('ATM Deposit' if tx_type == 'deposit' else 'ATM Withdrawal'))[:255]
+    return (number, tx_type, amount, description), None
+
+def _chunks(rows: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class _AccountState:
+    __slots__ = ('id', 'version', 'balance', 'daily_limit', 'withdrawn', 'withdrawal_date', 'touched')
+
+    def __init__(self, row, today: date):
+        self.id, self.version, self.balance, self.daily_limit = row.id, row.version, Decimal(str(row.balance)), Decimal(str(row.daily_limit))
+        self.withdrawal_date = row.last_withdrawal_date
+        self.withdrawn = Decimal(str(row.daily_withdrawn or 0)) if row.last_withdrawal_date == today else Decimal('0.00')
+        self.touched = False
+
+def _plan(chunk: List, today: date):
+    # Replays the chunk in order against one read of each account, applying
+    # transaction_service's balance and daily-limit rules; nothing is written yet
+    numbers = {valid[0] for _, valid, _ in chunk if valid}
+    rows = db.session.execute(select(
+        Account.id, Account.account_number, Account.version, Account.balance, Account.daily_limit,
+        Account.daily_withdrawn, Account.last_withdrawal_date).where(Account.account_number.in_(numbers))) if numbers else []
+    accounts = {row.account_number: _AccountState(row, today) for row in rows}
+    outcomes = []
+    for n, valid, error in chunk:
+        if error:
+            outcomes.append((n, None, error))
+            continue
+        number, tx_type, amount, description = valid
+        acc = accounts.get(number)
+        if acc is None:
+            outcomes.append((n, None, 'Account not found'))
+            continue
+        if tx_type == 'withdrawal':
+            if acc.withdrawn + amount > acc.daily_limit:
+                outcomes.append((n, None, 'Daily limit exceeded'))
+                continue
+            if acc.balance < amount:
+                outcomes.append((n, None, 'Insufficient balance'))
+                continue
+            acc.balance -= amount
+            acc.withdrawn += amount
+            acc.withdrawal_date = today
+        else:
+            acc.balance += amount
+        acc.touched = True
+        outcomes.append((n, (acc.id, tx_type, amount, acc.balance, description), None))
+    return [acc for acc in accounts.values() if acc.touched], outcomes
+
+def _write(accounts: List[_AccountState], applied: List[Tuple]) -> Optional[List[Tuple]]:
+    # one guarded UPDATE per touched account (executemany), then the transaction,
+    # receipt and rollup rows; None when another writer moved an account's version
+    params = [{'b_id': a.id, 'b_version': a.version, 'balance': a.balance, 'daily_withdrawn': a.withdrawn,
+               'last_withdrawal_date': a.withdrawal_date} for a in accounts]
+    stmt = update(Account.__table__).where(
+        Account.__table__.c.id == bindparam('b_id'), Account.__table__.c.version == bindparam('b_version')
+    ).values(version=Account.__table__.c.version + 1)
+    dialect = db.session.get_bind().dialect
+    if dialect.supports_sane_multi_rowcount:
+        if db.session.execute(stmt, params).rowcount != len(params):
+            return None
+    else:
+        for p in params:
+            if db.session.execute(stmt, p).rowcount != 1:
+                return None
+    tx_params = [{'account_id': account_id, 'type': tx_type, 'amount': amount, 'balance_after': balance_after, 'description': description}
+                 for account_id, tx_type, amount, balance_after, description in applied]
+    table = Transaction.__table__
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        inserted = db.session.execute(insert(table).returning(table.c.id, table.c.created_at, sort_by_parameter_order=True), tx_params).all()
+    else:
+        txs = [Transaction(**p) for p in tx_params]
+        db.session.add_all(txs)
+        db.session.flush()
+        inserted = [(tx.id, tx.created_at) for tx in txs]
+        for tx in txs:
+            db.session.expunge(tx)
+    receipts = [{'transaction_id': tx_id, 'receipt_number': f"RCP{created_at.strftime('%Y%m%d%H%M%S')}{tx_id}", 'content': ''}
+                for tx_id, created_at in inserted]
+    db.session.execute(insert(Receipt.__table__), receipts)
+    rollup: Dict[Tuple, Dict] = {}
+    for p, (_, created_at) in zip(tx_params, inserted):
+        key = (p['account_id'], created_at.date(), p['type'])
+        entry = rollup.setdefault(key, {'account_id': key[0], 'day': key[1], 'type': key[2], 'count': 0, 'amount': Decimal('0')})
+        entry['count'] += 1
+        entry['amount'] += p['amount']
+    bump_daily_aggregates(list(rollup.values()))
+    return [(tx_id, r['receipt_number']) for (tx_id, _), r in zip(inserted, receipts)]
+
+def _apply_chunk(chunk: List, retries: int) -> List[Dict]:
+    for attempt in range(retries + 1):
+        today = date.today()
+        accounts, outcomes = _plan(chunk, today)
+        applied = [planned for _, planned, _ in outcomes if planned]
+        try:
+            written = _write(accounts, applied) if applied else []
+            if written is not None:
+                db.session.commit()
+                break
+        except Exception:
+            db.session.rollback()
+            raise
+        # a live withdrawal or deposit raced us: redo the whole chunk from fresh reads
+        db.session.rollback()
+    else:
+        return [{'row': n, 'status': 'rejected', 'reason': error or 'Concurrent update detected'} for n, _, error in outcomes]
+    results, ids = [], iter(written)
+    for n, planned, error in outcomes:
+        if planned is None:
+            results.append({'row': n, 'status': 'rejected', 'reason': error})
+            continue
+        tx_id, receipt_number = next(ids)
+        results.append({'row': n, 'status': 'applied', 'transaction_id': tx_id, 'receipt_number': receipt_number, 'balance_after': float(planned[3])})
+    return results
+
+def results_dir() -> str:
+    return current_app.config.get('BULK_RESULTS_DIR') or os.path.join(current_app.instance_path, 'bulk_results')
+
+def _run_batch(rows: Iterable, apply_chunk, chunk_size: int) -> Dict:
+    # feeds chunks to apply_chunk and writes one NDJSON result line per input row
+    # to <results dir>/<batch_id>.ndjson
+    batch_id = uuid.uuid4().hex
+    out_dir = results_dir()
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f'{batch_id}.ndjson')
+    counts = defaultdict(int)
+    with open(path, 'w', encoding='utf-8') as out:
+        for chunk in _chunks(rows, chunk_size):
+            for result in apply_chunk(chunk):
+                counts[result['status']] += 1
+                out.write(json.dumps(result, separators=(',', ':')))
+                out.write('\n')
+    return {'batch_id': batch_id, 'result_file': path, **counts}
+
+def ingest_transactions(stream: IO[str], fmt: str) -> Dict:
+    # Applies a settlement batch chunk by chunk, one commit per chunk
+    retries = int(current_app.config.get('TX_CONFLICT_RETRIES', 3))
+    validated = ((n, *(_validate(row) if row is not None else (None, error))) for n, row, error in read_rows(stream, fmt))
+    summary = _run_batch(validated, lambda chunk: _apply_chunk(chunk, retries), int(current_app.config.get('BULK_CHUNK_SIZE', 2000)))
+    summary.setdefault('applied', 0)
+    summary.setdefault('rejected', 0)
+    return summary
+
+_USER_FIELDS = ('name', 'email', 'phone', 'account_number', 'pin')
+
+def _validate_user(row: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+    try:
+        payload = RegisterSchema().load({k: str(row.get(k) or '').strip() for k in _USER_FIELDS})
+    except ValidationError as ve:
+        return None, 'Invalid ' + ', '.join(sorted(ve.messages))
+    if not is_valid_email(payload['email']):
+        return None, 'Invalid email'
+    if not is_valid_phone(payload['phone']):
+        return None, 'Invalid phone'
+    return payload, None
+
+def _existing(emails: List[str], numbers: List[str]) -> Tuple[set, set]:
+    # one round trip for both uniqueness checks of the whole chunk
+    queries = []
+    if emails:
+        queries.append(select(literal('email'), User.email).where(User.email.in_(emails)))
+    if numbers:
+        queries.append(select(literal('account'), Account.account_number).where(Account.account_number.in_(numbers)))
+    found = {'email': set(), 'account': set()}
+    if queries:
+        for kind, value in db.session.execute(union_all(*queries)):
+            found[kind].add(value)
+    return found['email'], found['account']
+
+class _UserImport:
+    def __init__(self, workers: int):
+        self.workers = workers
+        # duplicates inside the file itself, across chunks
+        self.seen_emails: set = set()
+        self.seen_numbers: set = set()
+
+    def apply_chunk(self, chunk: List) -> List[Dict]:
+        outcomes: List[List] = []
+        for n, payload, error in chunk:
+            if payload is not None:
+                if payload['email'] in self.seen_emails:
+                    payload, error = None, 'Email repeated in batch'
+                elif payload['account_number'] in self.seen_numbers:
+                    payload, error = None, 'Account number repeated in batch'
+                else:
+                    self.seen_emails.add(payload['email'])
+                    self.seen_numbers.add(payload['account_number'])
+            outcomes.append([n, payload, error])
+        pending = [o for o in outcomes if o[1] is not None]
+        hashes = dict(zip((id(o) for o in pending), hash_pins([o[1]['pin'] for o in pending], workers=self.workers)))
+        for attempt in range(2):
+            emails, numbers = _existing([o[1]['email'] for o in pending], [o[1]['account_number'] for o in pending])
+            for o in pending:
+                if o[1]['email'] in emails:
+                    o[1], o[2] = None, 'Email already exists'
+                elif o[1]['account_number'] in numbers:
+                    o[1], o[2] = None, 'Account number already exists'
+            pending = [o for o in pending if o[1] is not None]
+            try:
+                self._insert(pending, hashes)
+                db.session.commit()
+                break
+            except IntegrityError:
+                # a concurrent /register took one of our keys: look again and retry once
+                db.session.rollback()
+                if attempt:
+                    for o in pending:
+                        o[1], o[2] = None, 'Conflicting concurrent registration'
+                    pending = []
+        throttle = login_throttle()
+        if throttle is not None and pending:
+            # numbers probed before the import must stop answering 'Account not found'
+            throttle.account_created(*(o[1]['account_number'] for o in pending))
+        results = []
+        for n, payload, error in outcomes:
+            if payload is None:
+                results.append({'row': n, 'status': 'rejected', 'reason': error})
+            else:
+                results.append({'row': n, 'status': 'accepted', 'user_id': payload['user_id'], 'account_id': payload['account_id']})
+        return results
+
+    def _insert(self, pending: List[List], hashes: Dict[int, str]):
+        if not pending:
+            return
+        dialect = db.session.get_bind().dialect
+        users = [{'name': p['name'], 'email': p['email'], 'phone': p['phone'], 'role': 'user'} for _, p, _ in pending]
+        accounts = lambda user_ids: [{'user_id': uid, 'account_number': o[1]['account_number'], 'pin_hash': hashes[id(o)],
+                                      'balance': 0, 'daily_limit': 25000, 'daily_withdrawn': 0, 'version': 0}
+                                     for uid, o in zip(user_ids, pending)]
+        if dialect.insert_executemany_returning_sort_by_parameter_order:
+            user_ids = db.session.scalars(insert(User.__table__).returning(User.__table__.c.id, sort_by_parameter_order=True), users).all()
+            table = Account.__table__
+            account_ids = db.session.scalars(insert(table).returning(table.c.id, sort_by_parameter_order=True), accounts(user_ids)).all()
+        else:
+            objs = [User(**u) for u in users]
+            db.session.add_all(objs)
+            db.session.flush()
+            user_ids = [u.id for u in objs]
+            accs = [Account(**a) for a in accounts(user_ids)]
+            db.session.add_all(accs)
+            db.session.flush()
+            account_ids = [a.id for a in accs]
+        for o, uid, aid in zip(pending, user_ids, account_ids):
+            o[1]['user_id'], o[1]['account_id'] = uid, aid
+
+def import_users(stream: IO[str], fmt: str = 'csv') -> Dict:
+    # Bulk onboarding: per chunk, one duplicate query, PINs hashed across cores,
+    # and set-based inserts of users and accounts, then one commit
+    config = current_app.config
+    job = _UserImport(int(config.get('BULK_PIN_HASH_WORKERS', os.cpu_count() or 1)))
+    validated = ((n, *(_validate_user(row) if row is not None else (None, error))) for n, row, error in read_rows(stream, fmt))
+    summary = _run_batch(validated, job.apply_chunk, int(config.get('BULK_IMPORT_CHUNK_SIZE', 1000)))
+    summary.setdefault('accepted', 0)
+    summary.setdefault('rejected', 0)
+    return summary
+
+def text_stream(raw: IO[bytes]) -> IO[str]:
+    return io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
@@ -0,0 +1,142 @@
+from io import BytesIO
+from typing import Dict, Iterable, Iterator, List
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from flask_backend.app.utils.pdf_stream import StreamingPdfWriter, text as pdf_text, text_right as pdf_text_right, line as pdf_line
+
+# Receipt layout, compiled once per process: the static text lives in a form
+# XObject and each field's value position is measured up front, so a render
+# only draws the handful of variable strings.
+_WIDTH, _HEIGHT = A4
+_LEFT = 50
+_TITLE = ("Helvetica-Bold", 16, "ATM SIMULATOR – Transaction Receipt")
+_FOOTER_FONT = ("Helvetica-Oblique", 10)
+_FOOTER = "Thank you for banking with us. Please retain this receipt."
+_FIELD_FONT = ("Helvetica", 11)
+_FIELDS = (
+    ('receipt_number', 'Receipt No: '),
+    ('date', 'Date: '),
+    ('account', 'Account: '),
+    ('name', 'Name: '),
+    ('transaction', 'Transaction: '),
+    ('amount', 'Amount: '),
+    ('balance_after', 'Balance After: '),
+)
+
+def _compile_layout():
+    y = _HEIGHT - 50
+    title_y = y
+    y -= 30
+    fields = []
+    for key, label in _FIELDS:
+        fields.append((key, label, y, _LEFT + stringWidth(label, *_FIELD_FONT)))
+        y -= 18
+    y += 18 - 30
+    return title_y, tuple(fields), y
+
+_TITLE_Y, _FIELD_LAYOUT, _FOOTER_Y = _compile_layout()
+_FORM_NAME = 'receipt_static'
+
+def _draw_static(c: canvas.Canvas):
+    c.setFont(_TITLE[0], _TITLE[1])
+    c.drawString(_LEFT, _TITLE_Y, _TITLE[2])
+    c.setFont(*_FIELD_FONT)
+    for _, label, y, _ in _FIELD_LAYOUT:
+        c.drawString(_LEFT, y, label)
+    c.setFont(*_FOOTER_FONT)
+    c.drawString(_LEFT, _FOOTER_Y, _FOOTER)
+
+def receipt_fields(rec, tx, acc, usr) -> Dict[str, str]:
+    return {
+        'receipt_number': rec.receipt_number,
+        'date': tx.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'account': f"****{acc.account_number[-4:]}",
+        'name': usr.name,
+        'transaction': tx.type.title(),
+        'amount': f"₹{float(tx.amount):,.2f}",
+        'balance_after': f"₹{float(tx.balance_after):,.2f}",
+    }
+
+# Module-level and fed plain strings so it can run in a worker process
+def render_receipt(fields: Dict[str, str]) -> bytes:
+    buf = BytesIO()
+    # invariant output: the same receipt always renders to the same bytes
+    c = canvas.Canvas(buf, pagesize=A4, invariant=1)
+    c.beginForm(_FORM_NAME)
+    _draw_static(c)
+    c.endForm()
+    c.doForm(_FORM_NAME)
+    c.setFont(*_FIELD_FONT)
+    for key, _, y, x in _FIELD_LAYOUT:
+        c.drawString(x, y, fields[key])
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+_STATEMENT_TOP = _HEIGHT - 50
+_STATEMENT_BOTTOM = 60
+_ROW_HEIGHT = 14
+_COLUMNS = (('Date', _LEFT), ('Type', 170), ('Description', 240))
+_AMOUNT_RIGHT = 460
+_BALANCE_RIGHT = _WIDTH - 50
+
+def _statement_header(header: Dict[str, str], page_no: int) -> List[bytes]:
+    y = _STATEMENT_TOP
+    ops = [pdf_text('F2', 16, _LEFT, y, "ATM SIMULATOR – Account Statement")]
+    y -= 24
+    for label in ('account', 'name', 'period'):
+        ops.append(pdf_text('F1', 10, _LEFT, y, f"{label.title()}: {header[label]}"))
+        y -= 14
+    ops.append(pdf_text_right('F1', 9, _BALANCE_RIGHT, _STATEMENT_BOTTOM - 25, f"Page {page_no}"))
+    y -= 10
+    for title, x in _COLUMNS:
+        ops.append(pdf_text('F2', 10, x, y, title))
+    ops.append(pdf_text_right('F2', 10, _AMOUNT_RIGHT, y, 'Amount'))
+    ops.append(pdf_text_right('F2', 10, _BALANCE_RIGHT, y, 'Balance'))
+    ops.append(pdf_line(_LEFT, y - 4, _BALANCE_RIGHT, y - 4))
+    return ops
+
+def render_statement(header: Dict[str, str], rows: Iterable) -> Iterator[bytes]:
+    # rows: (created_at, type, description, amount, balance_after), oldest first.
+    # Each page is yielded as soon as it fills, so only one page is ever held in memory.
+    writer = StreamingPdfWriter(A4)
+    yield writer.begin()
+    page_no = 1
+    ops = _statement_header(header, page_no)
+    y = _STATEMENT_TOP - 24 - 14 * 3 - 10 - _ROW_HEIGHT - 4
+    first_row_y = y
+    count, deposits, withdrawals, closing = 0, 0.0, 0.0, None
+    for created_at, tx_type, description, amount, balance_after in rows:
+        if y < _STATEMENT_BOTTOM:
+            yield writer.page(ops)
+            page_no += 1
+            ops = _statement_header(header, page_no)
+            y = first_row_y
+        amount, closing = float(amount), float(balance_after)
+        signed = amount if tx_type == 'deposit' else -amount
+        if tx_type == 'deposit':
+            deposits += amount
+        else:
+            withdrawals += amount
+        ops.append(pdf_text('F1', 9, _COLUMNS[0][1], y, created_at.strftime('%Y-%m-%d %H:%M')))
+        ops.append(pdf_text('F1', 9, _COLUMNS[1][1], y, tx_type.title()))
+        ops.append(pdf_text('F1', 9, _COLUMNS[2][1], y, (description or '')[:32]))
+        ops.append(pdf_text_right('F1', 9, _AMOUNT_RIGHT, y, f"{signed:,.2f}"))
+        ops.append(pdf_text_right('F1', 9, _BALANCE_RIGHT, y, f"{closing:,.2f}"))
+        y -= _ROW_HEIGHT
+        count += 1
+    if y - 4 * _ROW_HEIGHT < _STATEMENT_BOTTOM:
+        yield writer.page(ops)
+        page_no += 1
+        ops = _statement_header(header, page_no)
+        y = first_row_y
+    y -= _ROW_HEIGHT
+    if count == 0:
+        ops.append(pdf_text('F3', 10, _LEFT, y, "No transactions in this period."))
+    else:
+        ops.append(pdf_line(_LEFT, y + _ROW_HEIGHT - 4, _BALANCE_RIGHT, y + _ROW_HEIGHT - 4))
+        ops.append(pdf_text('F2', 10, _LEFT, y, f"{count} transaction(s)   Deposits (INR): {deposits:,.2f}   Withdrawals (INR): {withdrawals:,.2f}"))
+        ops.append(pdf_text('F2', 10, _LEFT, y - _ROW_HEIGHT, f"Closing balance (INR): {closing:,.2f}"))
+    yield writer.page(ops)
+    yield writer.end()
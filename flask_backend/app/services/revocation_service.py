@@ -0,0 +1,154 @@
+import hashlib
+import mmap
+import os
+import threading
+import time
+from typing import Dict, Optional
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from flask_backend.app import db
+from flask_backend.app.models.revoked_token import RevokedToken
+
+# Revoked JTIs live in the database (shared by every worker) until the token's own
+# exp. In front of it sits a bloom filter kept in mmap'd files that all workers map,
+# one file per expiry day: a token's exp says which file to look in, and files for
+# past days can simply be deleted. A miss in the filter is definitive, so the
+# common "not revoked" answer costs a few byte reads and no query.
+_BUCKET_SECONDS = 86400
+_HASHES = 4
+
+def _slots(jti: str, size: int):
+    digest = hashlib.sha256(jti.encode('utf-8')).digest()
+    return [int.from_bytes(digest[i * 8:(i + 1) * 8], 'little') % size for i in range(_HASHES)]
+
+class _BloomBucket:
+    # one byte per slot: setting a slot is an idempotent single-byte write, so
+    # concurrent writers in different processes can never clobber each other's bits
+    def __init__(self, path: str, size: int):
+        self.size = size
+        self._fd = os.open(path, os.O_RDWR)
+        self._map = mmap.mmap(self._fd, size)
+
+    def add(self, jti: str):
+        for slot in _slots(jti, self.size):
+            self._map[slot] = 1
+
+    def might_contain(self, jti: str) -> bool:
+        return all(self._map[slot] for slot in _slots(jti, self.size))
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+class RevocationStore:
+    def __init__(self, bloom_dir: str, bloom_bytes: int, purge_interval: float):
+        self.bloom_dir = bloom_dir
+        self.bloom_bytes = bloom_bytes
+        self.purge_interval = purge_interval
+        self._buckets: Dict[int, _BloomBucket] = {}
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self.bloom_negatives = 0
+        self.db_lookups = 0
+        os.makedirs(bloom_dir, exist_ok=True)
+
+    def _path(self, bucket: int) -> str:
+        return os.path.join(self.bloom_dir, f'revoked-{bucket}.bloom')
+
+    def _build(self, bucket: int) -> str:
+        # the filter file is missing (first use or wiped): rebuild it from the table
+        # in a private file, then publish it atomically; a concurrent builder that
+        # loses the race just maps the winner's file
+        tmp = f'{self._path(bucket)}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.truncate(self.bloom_bytes)
+        staging = _BloomBucket(tmp, self.bloom_bytes)
+        try:
+            start, end = bucket * _BUCKET_SECONDS, (bucket + 1) * _BUCKET_SECONDS
+            rows = db.session.query(RevokedToken.jti).filter(RevokedToken.expires_at >= start, RevokedToken.expires_at < end)
+            for (jti,) in rows:
+                staging.add(jti)
+            staging._map.flush()
+        finally:
+            staging.close()
+        try:
+            os.link(tmp, self._path(bucket))
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp)
+        return self._path(bucket)
+
+    def _bucket(self, exp: int) -> _BloomBucket:
+        bucket = int(exp) // _BUCKET_SECONDS
+        bloom = self._buckets.get(bucket)
+        if bloom is None:
+            with self._lock:
+                bloom = self._buckets.get(bucket)
+                if bloom is None:
+                    path = self._path(bucket)
+                    if not os.path.exists(path):
+                        self._build(bucket)
+                    bloom = self._buckets[bucket] = _BloomBucket(path, self.bloom_bytes)
+        return bloom
+
+    def revoke(self, jti: str, exp: int):
+        # bloom first: until the row commits, other workers must fall through to the DB
+        # (a false positive costs one lookup), never get a miss for a revoked token
+        self._bucket(exp).add(jti)
+        try:
+            db.session.add(RevokedToken(jti=jti, expires_at=int(exp)))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+        self._maybe_purge()
+
+    def is_revoked(self, jti: Optional[str], exp: int) -> bool:
+        if not jti:
+            return False
+        if not self._bucket(exp).might_contain(jti):
+            self.bloom_negatives += 1
+            return False
+        self.db_lookups += 1
+        return db.session.query(RevokedToken.jti).filter(RevokedToken.jti == jti, RevokedToken.expires_at > int(time.time())).first() is not None
+
+    def _maybe_purge(self):
+        now = time.time()
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        db.session.query(RevokedToken).filter(RevokedToken.expires_at <= int(now)).delete(synchronize_session=False)
+        db.session.commit()
+        today = int(now) // _BUCKET_SECONDS
+        with self._lock:
+            for bucket in [b for b in self._buckets if b < today]:
+                self._buckets.pop(bucket).close()
+        for name in os.listdir(self.bloom_dir):
+            if name.startswith('revoked-') and name.endswith('.bloom'):
+                try:
+                    if int(name[len('revoked-'):-len('.bloom')]) < today:
+                        os.remove(os.path.join(self.bloom_dir, name))
+                except (ValueError, OSError):
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        return {'bloom_negatives': self.bloom_negatives, 'db_lookups': self.db_lookups, 'open_buckets': len(self._buckets)}
+
+_stores: Dict[tuple, RevocationStore] = {}
+_stores_lock = threading.Lock()
+
+def revocation_store() -> RevocationStore:
+    config = current_app.config
+    bloom_dir = config.get('REVOCATION_BLOOM_DIR') or os.path.join(current_app.instance_path, 'revocation')
+    key = (bloom_dir, int(config.get('REVOCATION_BLOOM_BYTES', 1 << 20)), float(config.get('REVOCATION_PURGE_INTERVAL', 600)))
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(key, RevocationStore(*key))
+    return store
+
+def revoke_token(payload: Dict):
+    revocation_store().revoke(payload.get('jti'), payload.get('exp', 0))
+
+def is_token_revoked(payload: Dict) -> bool:
+    return revocation_store().is_revoked(payload.get('jti'), payload.get('exp', 0))
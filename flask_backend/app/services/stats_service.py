@@ -0,0 +1,127 @@
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import String, bindparam, func, literal_column, select
+from flask_backend.app import db
+from flask_backend.app.models.daily_aggregate import DailyAggregate
+from flask_backend.app.models.transaction import Transaction
+
+BUCKETS = ('hour', 'day', 'week')
+_STEP = {'hour': timedelta(hours=1), 'day': timedelta(days=1), 'week': timedelta(weeks=1)}
+
+def bucket_start(value: datetime, bucket: str) -> datetime:
+    if bucket == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    start = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == 'week':
+        start -= timedelta(days=start.weekday())
+    return start
+
+def _hour_expr(dialect: str):
+    column = Transaction.created_at
+    if dialect == 'postgresql':
+        return func.date_trunc('hour', column)
+    if dialect in ('mysql', 'mariadb'):
+        return func.date_format(column, '%Y-%m-%d %H:00:00')
+    return func.strftime('%Y-%m-%d %H:00:00', column)
+
+def _week_expr(dialect: str):
+    # Monday of the day's week
+    column = DailyAggregate.day
+    if dialect == 'postgresql':
+        return func.date_trunc('week', column)
+    if dialect in ('mysql', 'mariadb'):
+        return func.date_sub(column, literal_column('INTERVAL WEEKDAY(daily_aggregates.day) DAY'))
+    return func.date(column, 'weekday 0', '-6 days')
+
+def _as_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(str(value)[:19])
+
+def _aggregate(bucket: str, start: datetime, end: datetime) -> Dict[datetime, Dict]:
+    # Hourly buckets come from transactions through the created_at index; day and week
+    # buckets come from the daily rollup, so their cost does not grow with volume
+    dialect = db.session.get_bind().dialect.name
+    if bucket == 'hour':
+        key = _hour_expr(dialect).label('bucket')
+        count, amount, account = func.count(), func.sum(Transaction.amount), Transaction.account_id
+        where = (Transaction.created_at >= bindparam(None, start.strftime('%Y-%m-%d %H:%M:%S'), type_=String),
+                 Transaction.created_at < bindparam(None, end.strftime('%Y-%m-%d %H:%M:%S'), type_=String))
+        tx_type = Transaction.type
+    else:
+        key = (DailyAggregate.day if bucket == 'day' else _week_expr(dialect)).label('bucket')
+        count, amount, account = func.sum(DailyAggregate.count), func.sum(DailyAggregate.amount), DailyAggregate.account_id
+        where = (DailyAggregate.day >= start.date(), DailyAggregate.day < end.date())
+        tx_type = DailyAggregate.type
+    results: Dict[datetime, Dict] = {}
+    by_type = select(key, tx_type, count, amount, func.count(account.distinct())).where(*where).group_by(key, tx_type)
+    for value, kind, n, total, accounts in db.session.execute(by_type):
+        entry = results.setdefault(_as_datetime(value), {'active_accounts': 0, 'types': {}})
+        entry['types'][kind] = {'count': int(n), 'amount': float(total or 0), 'accounts': int(accounts)}
+    by_bucket = select(key, func.count(account.distinct())).where(*where).group_by(key)
+    for value, accounts in db.session.execute(by_bucket):
+        results[_as_datetime(value)]['active_accounts'] = int(accounts)
+    return results
+
+# Completed buckets never change (created_at is stamped by the database), so they
+# are memoized; each call only queries the buckets it has not seen yet, which after
+# the first call is just the bucket that is still filling up
+class StatsCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max(int(max_entries), 0)
+        self._entries: 'OrderedDict[Tuple[str, datetime], Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry: Dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+def bucketed_stats(cache: StatsCache, bucket: str, start: datetime, end: datetime, now: datetime) -> List[Dict]:
+    step = _STEP[bucket]
+    starts = []
+    current = bucket_start(start, bucket)
+    while current < end:
+        starts.append(current)
+        current += step
+    found: Dict[datetime, Dict] = {}
+    missing = []
+    for s in starts:
+        entry = cache.get((bucket, s))
+        if entry is None:
+            missing.append(s)
+        else:
+            found[s] = entry
+    # nothing has been recorded after now yet
+    missing = [s for s in missing if s <= now]
+    if missing:
+        fresh = _aggregate(bucket, missing[0], min(missing[-1] + step, bucket_start(now, bucket) + step))
+        for s in missing:
+            entry = fresh.get(s, {'active_accounts': 0, 'types': {}})
+            found[s] = entry
+            if s + step <= now:
+                cache.put((bucket, s), entry)
+    empty = {'active_accounts': 0, 'types': {}}
+    return [{'start': s.strftime('%Y-%m-%d %H:%M:%S'), **found.get(s, empty)} for s in starts]
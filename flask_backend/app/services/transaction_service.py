@@ -1,74 +1,99 @@
+import random
+import time
 from datetime import date
 from decimal import Decimal
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
 from flask_backend.app import db
 from flask_backend.app.models.account import Account
 from flask_backend.app.models.transaction import Transaction
 from flask_backend.app.models.receipt import Receipt
-
-def _ensure_daily_window(account: Account):
-    today = date.today()
-    if account.last_withdrawal_date != today:
-        account.daily_withdrawn = Decimal('0.00')
-        account.last_withdrawal_date = today
+from flask_backend.app.services.aggregate_service import bump_daily_aggregate
+from flask_backend.app.utils.account_lock import account_lock
+from flask_backend.app.utils.metrics import transaction_outcome
 
 def _build_receipt_number(tx: Transaction) -> str:
     return f"RCP{tx.created_at.strftime('%Y%m%d%H%M%S')}{tx.id}"
 
-def withdraw(account: Account, amount: Decimal, description: str = 'ATM Withdrawal', daily_limit: Decimal = Decimal('25000.00')):
-    if amount <= 0:
-        raise ValueError('Invalid amount')
-
-    # optimistic locking via version check
-    _ensure_daily_window(account)
-
-    if account.daily_withdrawn + amount > daily_limit:
-        raise RuntimeError('Daily limit exceeded')
-    if account.balance < amount:
-        raise RuntimeError('Insufficient balance')
+def _guarded_update(account: Account, delta: Decimal, withdrawn=None, today=None):
+    # single UPDATE guarded by the version we read; balance guard keeps withdrawals from overdrawing
+    stmt = update(Account).where(Account.id == account.id, Account.version == account.version)
+    values = {'balance': Account.balance + delta, 'version': Account.version + 1}
+    if withdrawn is not None:
+        stmt = stmt.where(Account.balance >= -delta)
+        values['daily_withdrawn'] = withdrawn
+        values['last_withdrawal_date'] = today
+    stmt = stmt.values(**values).execution_options(synchronize_session=False)
+    if db.session.get_bind().dialect.update_returning:
+        row = db.session.execute(stmt.returning(Account.balance, Account.version)).first()
+    else:
+        result = db.session.execute(stmt)
+        row = (account.balance + delta, account.version + 1) if result.rowcount == 1 else None
+    if row is None:
+        return None
+    set_committed_value(account, 'balance', row[0])
+    set_committed_value(account, 'version', row[1])
+    if withdrawn is not None:
+        set_committed_value(account, 'daily_withdrawn', withdrawn)
+        set_committed_value(account, 'last_withdrawal_date', today)
+    return row[0]
 
-    prev_version = account.version
-    account.balance = account.balance - amount
-    account.daily_withdrawn = account.daily_withdrawn + amount
-    account.version = account.version + 1
-    db.session.add(account)
-    db.session.flush()
+def _apply(account: Account, amount: Decimal, withdrawal: bool, daily_limit: Decimal = None) -> Decimal:
+    retries = int(current_app.config.get('TX_CONFLICT_RETRIES', 3))
+    backoff = float(current_app.config.get('TX_RETRY_BACKOFF_MS', 5)) / 1000.0
+    for attempt in range(retries + 1):
+        if withdrawal:
+            today = date.today()
+            withdrawn = account.daily_withdrawn if account.last_withdrawal_date == today else Decimal('0.00')
+            if withdrawn + amount > daily_limit:
+                raise RuntimeError('Daily limit exceeded')
+            if account.balance < amount:
+                raise RuntimeError('Insufficient balance')
+            new_balance = _guarded_update(account, -amount, withdrawn + amount, today)
+        else:
+            new_balance = _guarded_update(account, amount)
+        if new_balance is not None:
+            return new_balance
+        # someone else moved the version: start a fresh transaction, re-read and try again
+        db.session.rollback()
+        if attempt < retries:
+            time.sleep(random.uniform(0, backoff * (2 ** attempt)))
+            db.session.refresh(account)
+    raise RuntimeError('Concurrent update detected')
 
-    tx = Transaction(account_id=account.id, type='withdrawal', amount=amount, balance_after=account.balance, description=description)
+def _record(account: Account, tx_type: str, amount: Decimal, balance_after: Decimal, description: str):
+    tx = Transaction(account_id=account.id, type=tx_type, amount=amount, balance_after=balance_after, description=description)
     db.session.add(tx)
     db.session.flush()
+    bump_daily_aggregate(tx)
     receipt = Receipt(transaction_id=tx.id, receipt_number=_build_receipt_number(tx), content='')
     db.session.add(receipt)
+    db.session.flush()
+    # detach so commit does not expire them and the caller can serialize without reloading
+    db.session.expunge(tx)
+    db.session.expunge(receipt)
+    db.session.commit()
+    return tx, receipt
 
-    # enforce optimistic lock
-    updated = Account.query.filter_by(id=account.id, version=prev_version + 1).first() is not None
-    if not updated:
+def _refresh_if_contended(account: Account, contended: bool):
+    # we queued behind another writer, so our copy of the account is almost certainly stale
+    if contended:
         db.session.rollback()
-        raise RuntimeError('Concurrent update detected')
+        db.session.refresh(account)
 
-    db.session.commit()
-    return tx, receipt
+def withdraw(account: Account, amount: Decimal, description: str = 'ATM Withdrawal', daily_limit: Decimal = Decimal('25000.00')):
+    if amount <= 0:
+        raise ValueError('Invalid amount')
+    with transaction_outcome('withdrawal'), account_lock(account.id) as contended:
+        _refresh_if_contended(account, contended)
+        new_balance = _apply(account, amount, True, daily_limit)
+        return _record(account, 'withdrawal', amount, new_balance, description)
 
 def deposit(account: Account, amount: Decimal, description: str = 'ATM Deposit'):
     if amount <= 0:
         raise ValueError('Invalid amount')
-
-    prev_version = account.version
-    account.balance = account.balance + amount
-    account.version = account.version + 1
-    db.session.add(account)
-    db.session.flush()
-
-    tx = Transaction(account_id=account.id, type='deposit', amount=amount, balance_after=account.balance, description=description)
-    db.session.add(tx)
-    db.session.flush()
-    receipt = Receipt(transaction_id=tx.id, receipt_number=_build_receipt_number(tx), content='')
-    db.session.add(receipt)
-
-    updated = Account.query.filter_by(id=account.id, version=prev_version + 1).first() is not None
-    if not updated:
-        db.session.rollback()
-        raise RuntimeError('Concurrent update detected')
-
-    db.session.commit()
-    return tx, receipt
-
+    with transaction_outcome('deposit'), account_lock(account.id) as contended:
+        _refresh_if_contended(account, contended)
+        new_balance = _apply(account, amount, False)
+        return _record(account, 'deposit', amount, new_balance, description)
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+from flask import current_app
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: fall back to in-process striping only
+    fcntl = None
+
+# Striped per-account write locks: a thread lock per stripe inside the worker,
+# plus an flock on a per-stripe file so gunicorn workers queue behind each other too
+class AccountLocks:
+    def __init__(self, stripes: int, lock_dir: str, timeout: float):
+        self.stripes = max(int(stripes), 1)
+        self.lock_dir = lock_dir
+        self.timeout = timeout
+        self._locks = [threading.Lock() for _ in range(self.stripes)]
+        self._fds: Dict[int, int] = {}
+        self._stats_lock = threading.Lock()
+        self.waiting = 0
+        self.max_waiting = 0
+        self.acquired = 0
+        self.contended = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        if fcntl is not None:
+            os.makedirs(lock_dir, exist_ok=True)
+
+    def _fd(self, stripe: int) -> int:
+        fd = self._fds.get(stripe)
+        if fd is None:
+            fd = os.open(os.path.join(self.lock_dir, f'account-{stripe}.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+            self._fds[stripe] = fd
+        return fd
+
+    def _flock(self, stripe: int, deadline: float) -> bool:
+        if fcntl is None:
+            return True
+        fd = self._fd(stripe)
+        delay = 0.0005
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(delay)
+                delay = min(delay * 2, 0.01)
+
+    def _acquire(self, stripe: int) -> bool:
+        lock = self._locks[stripe]
+        if lock.acquire(blocking=False):
+            if self._flock(stripe, time.monotonic()):
+                return False
+            lock.release()
+        deadline = time.monotonic() + self.timeout
+        if not lock.acquire(timeout=self.timeout):
+            raise TimeoutError
+        if not self._flock(stripe, deadline):
+            lock.release()
+            raise TimeoutError
+        return True
+
+    @contextmanager
+    def hold(self, account_id: int):
+        stripe = account_id % self.stripes
+        start = time.perf_counter()
+        with self._stats_lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            contended = self._acquire(stripe)
+        except TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise RuntimeError('Concurrent update detected')
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.waiting -= 1
+        with self._stats_lock:
+            self.acquired += 1
+            self.contended += int(contended)
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        try:
+            yield contended
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._fds[stripe], fcntl.LOCK_UN)
+            self._locks[stripe].release()
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            return {
+                'waiting': self.waiting,
+                'max_waiting': self.max_waiting,
+                'acquired': self.acquired,
+                'contended': self.contended,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+            }
+
+_account_locks: Dict[tuple, AccountLocks] = {}
+_account_locks_guard = threading.Lock()
+
+def _locks_for(config, instance_path: str) -> AccountLocks:
+    lock_dir = config.get('ACCOUNT_LOCK_DIR') or os.path.join(instance_path, 'locks')
+    key = (int(config.get('ACCOUNT_LOCK_STRIPES', 64)), lock_dir, float(config.get('ACCOUNT_LOCK_TIMEOUT', 5)))
+    locks = _account_locks.get(key)
+    if locks is None:
+        with _account_locks_guard:
+            locks = _account_locks.setdefault(key, AccountLocks(*key))
+    return locks
+
+@contextmanager
+def account_lock(account_id: int):
+    if not current_app.config.get('ACCOUNT_LOCKS_ENABLED'):
+        yield False
+        return
+    with _locks_for(current_app.config, current_app.instance_path).hold(account_id) as contended:
+        yield contended
+
+def lock_stats() -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for locks in list(_account_locks.values()):
+        for name, value in locks.stats().items():
+            if name.endswith('_max') or name.startswith('max_'):
+                totals[name] = max(totals.get(name, 0), value)
+            else:
+                totals[name] = totals.get(name, 0) + value
+    return totals
@@ -0,0 +1,66 @@
+import threading
+from collections import Counter, namedtuple
+from functools import wraps
+from typing import Dict, Optional
+from flask import request, jsonify, current_app, g
+from flask_backend.app import db
+from flask_backend.app.models.user import User
+from flask_backend.app.models.account import Account
+from flask_backend.app.utils.jwt_utils import verify_token
+
+Identity = namedtuple('Identity', ['payload', 'user', 'account'])
+
+_identity_queries: Counter = Counter()
+_identity_lock = threading.Lock()
+
+def bearer_token() -> Optional[str]:
+    scheme, _, token = request.headers.get('Authorization', '').strip().partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return None
+    return token.strip()
+
+def _load_identity(user_id: int):
+    # user and account in one round trip; outer join so admins without an account still resolve
+    row = db.session.query(User, Account).outerjoin(Account, Account.user_id == User.id).filter(User.id == user_id).first()
+    with _identity_lock:
+        _identity_queries[request.endpoint or request.path] += 1
+    g.identity_queries = g.get('identity_queries', 0) + 1
+    return row
+
+def current_identity(token_type: str = 'access') -> Optional[Identity]:
+    cached = g.get('identity')
+    if cached is not None and cached.payload.get('type') == token_type:
+        return cached
+    token = bearer_token()
+    payload = verify_token(current_app.config, token) if token else None
+    if not payload or payload.get('type') != token_type:
+        return None
+    try:
+        user_id = int(payload.get('sub'))
+    except (TypeError, ValueError):
+        return None
+    row = _load_identity(user_id)
+    if row is None:
+        return None
+    identity = Identity(payload, row[0], row[1])
+    g.identity = identity
+    return identity
+
+def identity_query_counts() -> Dict[str, int]:
+    with _identity_lock:
+        return dict(_identity_queries)
+
+def login_required(view=None, *, require_account: bool = True, role: Optional[str] = None):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            identity = current_identity()
+            if identity is None:
+                return jsonify({'success': False, 'message': 'Invalid token'}), 401
+            if require_account and identity.account is None:
+                return jsonify({'success': False, 'message': 'Session invalid'}), 401
+            if role and identity.user.role != role:
+                return jsonify({'success': False, 'message': 'Forbidden'}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator(view) if view is not None else decorator
@@ -1,17 +1,38 @@
 import os
 import time
 import uuid
-from typing import Optional, Dict
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple
 import jwt
+from jwt.algorithms import RSAAlgorithm, ECAlgorithm, OKPAlgorithm
 from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.asymmetric import rsa, ec, ed25519
 from cryptography.hazmat.backends import default_backend
 
-def _ensure_keys(private_path: str, public_path: str):
+SUPPORTED_ALGORITHMS = ('RS256', 'ES256', 'EdDSA')
+
+def _generate_key(algorithm: str):
+    if algorithm == 'ES256':
+        return ec.generate_private_key(ec.SECP256R1(), backend=default_backend())
+    if algorithm == 'EdDSA':
+        return ed25519.Ed25519PrivateKey.generate()
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
+
+def _key_algorithm(public_key) -> str:
+    if isinstance(public_key, ec.EllipticCurvePublicKey):
+        return 'ES256'
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        return 'EdDSA'
+    return 'RS256'
+
+def _ensure_keys(private_path: str, public_path: str, algorithm: str = 'RS256'):
     if os.path.exists(private_path) and os.path.exists(public_path):
         return
     os.makedirs(os.path.dirname(private_path), exist_ok=True)
-    key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
+    key = _generate_key(algorithm)
     private_bytes = key.private_bytes(
         encoding=serialization.Encoding.PEM,
         format=serialization.PrivateFormat.PKCS8,
@@ -26,13 +47,81 @@ def _ensure_keys(private_path: str, public_path: str):
     with open(public_path, 'wb') as f:
         f.write(public_bytes)
 
-def _load_keys(private_path: str, public_path: str):
-    _ensure_keys(private_path, public_path)
-    with open(private_path, 'rb') as f:
-        priv = f.read()
-    with open(public_path, 'rb') as f:
-        pub = f.read()
-    return priv, pub
+def _key_id(public_key) -> str:
+    der = public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return base64.urlsafe_b64encode(hashlib.sha256(der).digest()[:12]).decode('ascii')
+
+def _load_public_key(path: str):
+    with open(path, 'rb') as f:
+        return serialization.load_pem_public_key(f.read(), backend=default_backend())
+
+# Parsed once per worker: the signing key plus every public key accepted for verification, by kid
+class _KeyRing:
+    def __init__(self, private_path: str, public_path: str, extra_public_paths: Tuple[str, ...], algorithm: str):
+        _ensure_keys(private_path, public_path, algorithm)
+        with open(private_path, 'rb') as f:
+            self.private_key = serialization.load_pem_private_key(f.read(), password=None, backend=default_backend())
+        signing_public = _load_public_key(public_path)
+        self.kid = _key_id(signing_public)
+        self.algorithm = _key_algorithm(signing_public)
+        if self.algorithm != algorithm:
+            # existing key files decide the algorithm; never sign with one other than configured
+            raise ValueError(f'JWT_ALGORITHM is {algorithm} but {public_path} is a {self.algorithm} key')
+        self.public_keys = {self.kid: signing_public}
+        for path in extra_public_paths:
+            key = _load_public_key(path)
+            self.public_keys.setdefault(_key_id(key), key)
+
+_keyrings: Dict[Tuple, Tuple[float, Tuple, _KeyRing]] = {}
+_keyrings_lock = threading.Lock()
+
+def _file_stamp(paths) -> Tuple:
+    stamp = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+def _extra_public_paths(config) -> Tuple[str, ...]:
+    raw = _cfg(config, 'JWT_VERIFY_PUBLIC_KEY_PATHS', '') or ''
+    if isinstance(raw, str):
+        raw = raw.split(',')
+    return tuple(p.strip() for p in raw if p and p.strip())
+
+def _algorithm(config) -> str:
+    algorithm = _cfg(config, 'JWT_ALGORITHM', 'RS256') or 'RS256'
+    if algorithm not in SUPPORTED_ALGORITHMS:
+        raise ValueError(f'Unsupported JWT algorithm: {algorithm}')
+    return algorithm
+
+def _keyring(config) -> _KeyRing:
+    paths = (_cfg(config, 'JWT_PRIVATE_KEY_PATH'), _cfg(config, 'JWT_PUBLIC_KEY_PATH')) + _extra_public_paths(config)
+    algorithm = _algorithm(config)
+    key = (algorithm,) + paths
+    interval = float(_cfg(config, 'JWT_KEY_RELOAD_INTERVAL', 5) or 0)
+    now = time.monotonic()
+    entry = _keyrings.get(key)
+    if entry and now - entry[0] < interval:
+        return entry[2]
+    with _keyrings_lock:
+        entry = _keyrings.get(key)
+        if entry and now - entry[0] < interval:
+            return entry[2]
+        stamp = _file_stamp(paths)
+        if entry and entry[1] == stamp:
+            ring = entry[2]
+        else:
+            ring = _KeyRing(paths[0], paths[1], paths[2:], algorithm)
+            # a key dropped from the rotation must stop verifying straight away
+            _token_cache.clear()
+        _keyrings[key] = (now, stamp, ring)
+        return ring
 
 def _cfg(config, key, default=None):
     try:
@@ -40,8 +129,67 @@ def _cfg(config, key, default=None):
     except Exception:
         return getattr(config, key, default)
 
+# Per-worker LRU of already verified tokens, keyed by a hash of the token and valid until its exp
+class _VerifiedTokenCache:
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._entries: 'OrderedDict[bytes, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: bytes) -> Optional[Dict]:
+        with self._lock:
+            payload = self._entries.get(digest)
+            if payload is not None and payload.get('exp', 0) > time.time():
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return dict(payload)
+            if payload is not None:
+                del self._entries[digest]
+            self.misses += 1
+            return None
+
+    def put(self, digest: bytes, payload: Dict):
+        if self.max_size <= 0 or 'exp' not in payload:
+            return
+        with self._lock:
+            self._entries[digest] = dict(payload)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, digest: bytes):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def resize(self, max_size: int):
+        with self._lock:
+            self.max_size = max_size
+            while len(self._entries) > max(max_size, 0):
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'max_size': self.max_size}
+
+_token_cache = _VerifiedTokenCache()
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode('utf-8', 'surrogatepass')).digest()
+
+def token_cache_stats() -> Dict[str, int]:
+    return _token_cache.stats()
+
+def evict_token(token: str):
+    _token_cache.discard(_token_digest(token))
+
 def create_access_token(config, user_id: int, role: str = 'user') -> str:
-    private_key, _ = _load_keys(_cfg(config, 'JWT_PRIVATE_KEY_PATH'), _cfg(config, 'JWT_PUBLIC_KEY_PATH'))
+    ring = _keyring(config)
     payload = {
         'sub': str(user_id),
         'role': role,
@@ -50,10 +198,10 @@ def create_access_token(config, user_id: int, role: str = 'user') -> str:
         'exp': int(time.time()) + int(_cfg(config, 'JWT_ACCESS_TOKEN_EXPIRE_MINUTES', 15)) * 60,
         'jti': str(uuid.uuid4())
     }
-    return jwt.encode(payload, private_key, algorithm='RS256')
+    return jwt.encode(payload, ring.private_key, algorithm=ring.algorithm, headers={'kid': ring.kid})
 
 def create_refresh_token(config, user_id: int) -> str:
-    private_key, _ = _load_keys(_cfg(config, 'JWT_PRIVATE_KEY_PATH'), _cfg(config, 'JWT_PUBLIC_KEY_PATH'))
+    ring = _keyring(config)
     payload = {
         'sub': str(user_id),
         'type': 'refresh',
@@ -61,12 +209,42 @@ def create_refresh_token(config, user_id: int) -> str:
         'exp': int(time.time()) + int(_cfg(config, 'JWT_REFRESH_TOKEN_EXPIRE_DAYS', 7)) * 24 * 3600,
         'jti': str(uuid.uuid4())
     }
-    return jwt.encode(payload, private_key, algorithm='RS256')
+    return jwt.encode(payload, ring.private_key, algorithm=ring.algorithm, headers={'kid': ring.kid})
 
 def verify_token(config, token: str) -> Optional[Dict]:
-    _, public_key = _load_keys(_cfg(config, 'JWT_PRIVATE_KEY_PATH'), _cfg(config, 'JWT_PUBLIC_KEY_PATH'))
+    ring = _keyring(config)
+    max_size = int(_cfg(config, 'JWT_VERIFY_CACHE_SIZE', 4096))
+    if max_size != _token_cache.max_size:
+        _token_cache.resize(max_size)
+    digest = _token_digest(token) if max_size > 0 else None
+    if digest is not None:
+        cached = _token_cache.get(digest)
+        if cached is not None:
+            return cached
     try:
-        payload = jwt.decode(token, public_key, algorithms=['RS256'])
-        return payload
+        kid = jwt.get_unverified_header(token).get('kid')
+        # tokens issued before key ids were introduced carry no kid
+        public_key = ring.public_keys.get(kid) if kid else ring.public_keys[ring.kid]
+        if public_key is None:
+            return None
+        payload = jwt.decode(token, public_key, algorithms=[_key_algorithm(public_key)])
     except Exception:
         return None
+    if digest is not None:
+        _token_cache.put(digest, payload)
+    return payload
+
+def jwks(config) -> Dict[str, List[Dict]]:
+    ring = _keyring(config)
+    keys = []
+    for kid, public_key in ring.public_keys.items():
+        algorithm = _key_algorithm(public_key)
+        if algorithm == 'ES256':
+            jwk = ECAlgorithm.to_jwk(public_key, as_dict=True)
+        elif algorithm == 'EdDSA':
+            jwk = OKPAlgorithm.to_jwk(public_key, as_dict=True)
+        else:
+            jwk = RSAAlgorithm.to_jwk(public_key, as_dict=True)
+        jwk.update({'kid': kid, 'use': 'sig', 'alg': algorithm})
+        keys.append(jwk)
+    return {'keys': keys}
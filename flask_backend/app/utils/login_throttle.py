@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from flask import current_app
+
+# Login throttling state lives in its own small SQLite file (WAL) next to the app,
+# so every worker sees the same counters and nothing here touches the main database.
+# Rate limits use a sliding window approximated from two fixed windows: the
+# previous window's count is weighted by how much of it still overlaps "now".
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS login_hits (key TEXT NOT NULL, window INTEGER NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (key, window)) WITHOUT ROWID',
+    'CREATE TABLE IF NOT EXISTS login_failures (account TEXT PRIMARY KEY, failures INTEGER NOT NULL, first_at REAL NOT NULL, locked_until REAL NOT NULL DEFAULT 0) WITHOUT ROWID',
+    'CREATE TABLE IF NOT EXISTS unknown_accounts (account TEXT PRIMARY KEY, expires_at REAL NOT NULL) WITHOUT ROWID',
+)
+
+class Throttled(Exception):
+    def __init__(self, status: int, message: str, retry_after: int):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = max(int(retry_after), 1)
+
+class LoginThrottle:
+    def __init__(self, path: str, window: int, ip_limit: int, account_limit: int,
+                 max_failures: int, lockout_seconds: int, negative_ttl: int):
+        self.path = path
+        self.window = max(int(window), 1)
+        self.ip_limit = ip_limit
+        self.account_limit = account_limit
+        self.max_failures = max_failures
+        self.lockout_seconds = lockout_seconds
+        self.negative_ttl = negative_ttl
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._last_purge = 0.0
+        self.counters = {
+            'processed': 0,
+            'rejected_ip': 0,
+            'rejected_account': 0,
+            'rejected_locked': 0,
+            'rejected_unknown': 0,
+            'failures': 0,
+            'lockouts': 0,
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._conn()
+        for stmt in _SCHEMA:
+            conn.execute(stmt)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # autocommit; writes take BEGIN IMMEDIATE so concurrent workers queue instead of failing
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.counters[name] += 1
+
+    def _hit(self, conn: sqlite3.Connection, key: str, now: float) -> float:
+        window = int(now // self.window)
+        conn.execute('INSERT INTO login_hits (key, window, count) VALUES (?, ?, 1) '
+                     'ON CONFLICT (key, window) DO UPDATE SET count = count + 1', (key, window))
+        counts = dict(conn.execute('SELECT window, count FROM login_hits WHERE key = ? AND window >= ?', (key, window - 1)))
+        overlap = 1.0 - (now - window * self.window) / self.window
+        return counts.get(window, 0) + counts.get(window - 1, 0) * overlap
+
+    def admit(self, ip: Optional[str], account: str):
+        # Raises Throttled when the attempt must be turned away; runs before any
+        # account lookup or PIN hashing. Every admitted or rejected attempt counts.
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            ip_rate = self._hit(conn, f'ip:{ip}', now) if ip else 0
+            account_rate = self._hit(conn, f'acct:{account}', now)
+            locked = conn.execute('SELECT locked_until FROM login_failures WHERE account = ?', (account,)).fetchone()
+            unknown = conn.execute('SELECT expires_at FROM unknown_accounts WHERE account = ?', (account,)).fetchone()
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._maybe_purge(now)
+        if ip_rate > self.ip_limit:
+            self._count('rejected_ip')
+            raise Throttled(429, 'Too many login attempts, please retry later', self.window)
+        if account_rate > self.account_limit:
+            self._count('rejected_account')
+            raise Throttled(429, 'Too many login attempts, please retry later', self.window)
+        if locked and locked[0] > now:
+            self._count('rejected_locked')
+            raise Throttled(423, 'Account temporarily locked', locked[0] - now)
+        if unknown and unknown[0] > now:
+            self._count('rejected_unknown')
+            raise Throttled(401, 'Account not found', unknown[0] - now)
+        self._count('processed')
+
+    def account_not_found(self, account: str):
+        if self.negative_ttl <= 0:
+            return
+        self._conn().execute('INSERT OR REPLACE INTO unknown_accounts (account, expires_at) VALUES (?, ?)',
+                             (account, time.time() + self.negative_ttl))
+
+    def account_created(self, *accounts: str):
+        self._conn().executemany('DELETE FROM unknown_accounts WHERE account = ?', [(a,) for a in accounts])
+
+    def pin_failed(self, account: str) -> bool:
+        # Returns True when this failure locks the account. Failures are counted
+        # from the first one until lockout_seconds later, then start over.
+        now = time.time()
+        self._count('failures')
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT failures, first_at FROM login_failures WHERE account = ?', (account,)).fetchone()
+            failures, first_at = (row[0] + 1, row[1]) if row and now - row[1] < self.lockout_seconds else (1, now)
+            locked_until = now + self.lockout_seconds if failures >= self.max_failures else 0
+            if locked_until:
+                failures, first_at = 0, now
+            conn.execute('INSERT OR REPLACE INTO login_failures (account, failures, first_at, locked_until) VALUES (?, ?, ?, ?)',
+                         (account, failures, first_at, locked_until))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        if locked_until:
+            self._count('lockouts')
+        return bool(locked_until)
+
+    def pin_succeeded(self, account: str):
+        self._conn().execute('DELETE FROM login_failures WHERE account = ? AND locked_until <= ?', (account, time.time()))
+
+    def _maybe_purge(self, now: float):
+        if now - self._last_purge < self.window:
+            return
+        self._last_purge = now
+        conn = self._conn()
+        conn.execute('DELETE FROM login_hits WHERE window < ?', (int(now // self.window) - 1,))
+        conn.execute('DELETE FROM unknown_accounts WHERE expires_at <= ?', (now,))
+        conn.execute('DELETE FROM login_failures WHERE locked_until <= ? AND first_at <= ?', (now, now - self.lockout_seconds))
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self.counters)
+
+_throttles: Dict[Tuple, LoginThrottle] = {}
+_throttles_lock = threading.Lock()
+
+def login_throttle() -> Optional[LoginThrottle]:
+    config = current_app.config
+    if not config.get('LOGIN_THROTTLE_ENABLED', True):
+        return None
+    path = config.get('LOGIN_THROTTLE_DB') or os.path.join(current_app.instance_path, 'login_throttle.db')
+    key = (
+        path,
+        int(config.get('LOGIN_THROTTLE_WINDOW', 60)),
+        int(config.get('LOGIN_THROTTLE_IP_LIMIT', 120)),
+        int(config.get('LOGIN_THROTTLE_ACCOUNT_LIMIT', 20)),
+        int(config.get('LOGIN_LOCKOUT_FAILURES', 5)),
+        int(config.get('LOGIN_LOCKOUT_SECONDS', 900)),
+        int(config.get('LOGIN_NEGATIVE_CACHE_TTL', 300)),
+    )
+    throttle = _throttles.get(key)
+    if throttle is None:
+        with _throttles_lock:
+            throttle = _throttles.get(key)
+            if throttle is None:
+                throttle = _throttles[key] = LoginThrottle(*key)
+    return throttle
+
+def throttle_stats() -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    for throttle in list(_throttles.values()):
+        for name, value in throttle.stats().items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
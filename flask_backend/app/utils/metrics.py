@@ -0,0 +1,214 @@
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from flask_backend.app.utils.login_throttle import throttle_stats
+
+# Prometheus metrics, aggregated across workers without a shared server: every worker
+# keeps its own counters in memory and at most every METRICS_FLUSH_INTERVAL seconds
+# (plus whenever it serves /metrics) writes them to METRICS_DIR/metrics-<pid>.json.
+# /metrics sums all files. Counters of stopped workers stay in their files, so
+# counters never go backwards; clear METRICS_DIR when (re)deploying.
+HISTOGRAMS = {
+    'atm_http_request_duration_seconds': ('HTTP request latency by route, method and status', ('route', 'method', 'status'),
+                                          (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)),
+    'atm_request_sql_statements': ('SQL statements executed per request', ('route',), (1, 2, 4, 8, 16, 32, 64, 128)),
+    'atm_request_sql_seconds': ('Time spent in SQL per request', ('route',), (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)),
+    'atm_db_pool_checkout_wait_seconds': ('Wait for a pooled database connection', (), (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)),
+}
+COUNTERS = {
+    'atm_transaction_outcomes_total': ('Withdrawals and deposits by outcome', ('type', 'outcome')),
+}
+OUTCOMES = {
+    'Daily limit exceeded': 'daily_limit_exceeded',
+    'Insufficient balance': 'insufficient_balance',
+    'Concurrent update detected': 'concurrent_update',
+}
+
+def _login_attempts():
+    stats = throttle_stats()
+    return [((outcome,), stats.get(outcome, 0))
+            for outcome in ('processed', 'rejected_ip', 'rejected_account', 'rejected_locked', 'rejected_unknown')]
+
+def _login_failures():
+    stats = throttle_stats()
+    return [(('wrong_pin',), stats.get('failures', 0)), (('lockout',), stats.get('lockouts', 0))]
+
+# Read from the per-worker stats the subsystems already keep, at flush time:
+# name -> (help, type, label names, function returning [(labels, value)])
+COLLECTED = {
+    'atm_login_attempts_total': ('Login attempts processed or rejected by the login throttle', 'counter', ('outcome',), _login_attempts),
+    'atm_login_failures_total': ('Wrong PINs and the lockouts they caused', 'counter', ('kind',), _login_failures),
+}
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # histogram series: per-bucket (not cumulative) counts, the +Inf bucket, then the sum
+        self.histograms: Dict[str, Dict[tuple, list]] = {name: {} for name in HISTOGRAMS}
+        self.counters: Dict[str, Dict[tuple, float]] = {name: {} for name in COUNTERS}
+        self._flushed = 0.0
+
+    def observe(self, name: str, labels: tuple, value: float):
+        buckets = HISTOGRAMS[name][2]
+        slot = bisect_left(buckets, value)
+        with self._lock:
+            series = self.histograms[name].get(labels)
+            if series is None:
+                series = self.histograms[name][labels] = [0] * (len(buckets) + 1) + [0.0]
+            series[slot] += 1
+            series[-1] += value
+
+    def inc(self, name: str, labels: tuple, amount: float = 1):
+        with self._lock:
+            self.counters[name][labels] = self.counters[name].get(labels, 0) + amount
+
+    def snapshot(self) -> Dict:
+        collected = {name: [[list(k), v] for k, v in spec[3]()] for name, spec in COLLECTED.items()}
+        with self._lock:
+            return {
+                'histograms': {name: [[list(k), list(v)] for k, v in series.items()] for name, series in self.histograms.items()},
+                'counters': {name: [[list(k), v] for k, v in series.items()] for name, series in self.counters.items()},
+                'collected': collected,
+            }
+
+    def flush(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+        self._flushed = time.monotonic()
+
+    def flush_due(self, interval: float) -> bool:
+        return time.monotonic() - self._flushed >= interval
+
+_metrics = Metrics()
+
+def metrics() -> Metrics:
+    return _metrics
+
+def metrics_dir() -> str:
+    return current_app.config.get('METRICS_DIR') or os.path.join(current_app.instance_path, 'metrics')
+
+def _merge(directory: str) -> Tuple[Dict[str, Dict[tuple, list]], Dict[str, Dict[tuple, float]]]:
+    histograms: Dict[str, Dict[tuple, list]] = {name: {} for name in HISTOGRAMS}
+    counters: Dict[str, Dict[tuple, float]] = {name: {} for name in [*COUNTERS, *COLLECTED]}
+    for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, rows in data.get('histograms', {}).items():
+            for labels, values in rows if name in histograms else ():
+                merged = histograms[name].setdefault(tuple(labels), [0] * len(values))
+                histograms[name][tuple(labels)] = [a + b for a, b in zip(merged, values)]
+        for name, rows in [*data.get('counters', {}).items(), *data.get('collected', {}).items()]:
+            for labels, value in rows if name in counters else ():
+                counters[name][tuple(labels)] = counters[name].get(tuple(labels), 0) + value
+    return histograms, counters
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names, values, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def render_metrics() -> str:
+    directory = metrics_dir()
+    _metrics.flush(directory)
+    histograms, counters = _merge(directory)
+    lines: List[str] = []
+    for name, (help_text, label_names, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for labels, series in sorted(histograms[name].items()):
+            cumulative = 0
+            for bound, count in zip([*(repr(float(b)) for b in buckets), '+Inf'], series[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(label_names, labels, ("le", bound))} {cumulative}')
+            lines.append(f'{name}_sum{_labels(label_names, labels)} {series[-1]}')
+            lines.append(f'{name}_count{_labels(label_names, labels)} {cumulative}')
+    for name, help_text, kind, label_names in [*((n, h, 'counter', l) for n, (h, l) in COUNTERS.items()),
+                                               *((n, h, k, l) for n, (h, k, l, _) in COLLECTED.items())]:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for labels, value in sorted(counters[name].items()):
+            lines.append(f'{name}{_labels(label_names, labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+@contextmanager
+def transaction_outcome(tx_type: str):
+    try:
+        yield
+    except RuntimeError as e:
+        _metrics.inc('atm_transaction_outcomes_total', (tx_type, OUTCOMES.get(str(e), 'error')))
+        raise
+    _metrics.inc('atm_transaction_outcomes_total', (tx_type, 'success'))
+
+def _route() -> str:
+    # the URL rule, not the path, so ids in URLs cannot blow up the label cardinality
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+def _instrument_pool(engine):
+    pool = engine.pool
+    do_get = pool._do_get
+
+    def timed_get():
+        start = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            _metrics.observe('atm_db_pool_checkout_wait_seconds', (), time.perf_counter() - start)
+    pool._do_get = timed_get
+
+def instrument_engine(engine):
+    _instrument_pool(engine)
+
+    @event.listens_for(engine, 'engine_disposed')
+    def _on_dispose(engine):
+        # dispose() swaps in a fresh pool
+        _instrument_pool(engine)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info['metrics_start'] = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop('metrics_start', None)
+        if start is None or not has_request_context():
+            return
+        sql = g.get('metrics_sql')
+        if sql is None:
+            sql = g.metrics_sql = [0, 0.0]
+        sql[0] += 1
+        sql[1] += time.perf_counter() - start
+
+def init_metrics(app):
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record(response):
+        start = g.get('metrics_start')
+        if start is None:
+            return response
+        route = _route()
+        _metrics.observe('atm_http_request_duration_seconds', (route, request.method, str(response.status_code)), time.perf_counter() - start)
+        count, seconds = g.get('metrics_sql') or (0, 0.0)
+        _metrics.observe('atm_request_sql_statements', (route,), count)
+        _metrics.observe('atm_request_sql_seconds', (route,), seconds)
+        if _metrics.flush_due(float(current_app.config.get('METRICS_FLUSH_INTERVAL', 5))):
+            _metrics.flush(metrics_dir())
+        return response
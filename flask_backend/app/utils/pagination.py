@@ -0,0 +1,67 @@
+import base64
+import json
+from typing import List, Optional, Tuple
+from flask import request, current_app, jsonify
+from sqlalchemy import and_, or_, bindparam, String
+from werkzeug.exceptions import BadRequest
+
+class PaginationError(BadRequest):
+    pass
+
+def encode_cursor(created_at, row_id: int) -> str:
+    raw = json.dumps([str(created_at), row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return str(created_at), int(row_id)
+    except Exception:
+        raise PaginationError('Invalid cursor')
+
+def parse_limit(args, default: int, maximum: int) -> int:
+    try:
+        limit = int(args.get('limit', default))
+    except ValueError:
+        raise PaginationError('Invalid limit')
+    return max(1, min(limit, maximum))
+
+def page_size(default: int) -> int:
+    return parse_limit(request.args, default, int(current_app.config.get('PAGINATION_MAX_LIMIT', 100)))
+
+def keyset_statement(query, model, args, limit: int):
+    # newest first on (created_at, id): id breaks ties so no row is skipped or repeated.
+    # Works on a legacy Query or a select(); fetches one extra row to detect a next page
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    cursor = args.get('cursor')
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # compare against the timestamp text as the database rendered it, so SQLite's
+        # CURRENT_TIMESTAMP format round-trips exactly; other backends cast implicitly
+        created_at = bindparam('cursor_created_at', created_at, type_=String)
+        query = query.filter(or_(model.created_at < created_at, and_(model.created_at == created_at, model.id < row_id)))
+    elif args.get('offset'):
+        # legacy offset paging; kept for existing clients, prefer the cursor
+        try:
+            query = query.offset(max(int(args['offset']), 0))
+        except ValueError:
+            raise PaginationError('Invalid offset')
+    return query.limit(limit + 1)
+
+def split_page(rows: List, limit: int) -> Tuple[List, Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+def keyset_page(query, model, default_limit: int = 20) -> Tuple[List, Optional[str]]:
+    limit = page_size(default_limit)
+    return split_page(keyset_statement(query, model, request.args, limit).all(), limit)
+
+def paginated_response(items: List, next_cursor: Optional[str]):
+    # the body stays a plain list for existing clients; the cursor travels in a header
+    resp = jsonify(items)
+    if next_cursor:
+        resp.headers['X-Next-Cursor'] = next_cursor
+    return resp
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+def receipt_cache_key(receipt_number: str, template_version: str) -> str:
+    # a receipt never changes once issued, so its number plus the template version fully determine the PDF
+    return hashlib.sha256(f'{template_version}:{receipt_number}'.encode('utf-8')).hexdigest()
+
+# Bounded in-memory LRU of rendered PDFs; entries pushed out of memory spill to
+# disk (itself LRU-bounded), where any worker sharing the directory can find them
+class PdfCache:
+    def __init__(self, max_bytes: int, spill_dir: Optional[str] = None, max_disk_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: 'OrderedDict[str, int]' = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, f'{key}.pdf')
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return data
+        data = self._read_spilled(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self.put(key, data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        spill = []
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_bytes and self._memory:
+                old_key, old_data = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old_data)
+                spill.append((old_key, old_data))
+        for old_key, old_data in spill:
+            self._spill(old_key, old_data)
+
+    def _read_spilled(self, key: str) -> Optional[bytes]:
+        if not self.spill_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        with self._lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+        return data
+
+    def _spill(self, key: str, data: bytes):
+        if not self.spill_dir or self.max_disk_bytes <= 0:
+            return
+        path = self._path(key)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        evict = []
+        with self._lock:
+            if key not in self._disk:
+                self._disk[key] = len(data)
+                self._disk_bytes += len(data)
+            self._disk.move_to_end(key)
+            while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+                old_key, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                evict.append(old_key)
+        for old_key in evict:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+            }
+
+_caches: Dict[Tuple, PdfCache] = {}
+_caches_lock = threading.Lock()
+
+def receipt_pdf_cache(config, instance_path: str) -> PdfCache:
+    spill_dir = config.get('RECEIPT_PDF_CACHE_DIR') or os.path.join(instance_path, 'receipt_pdf_cache')
+    key = (int(config.get('RECEIPT_PDF_CACHE_MAX_BYTES', 32 * 1024 * 1024)), spill_dir, int(config.get('RECEIPT_PDF_CACHE_MAX_DISK_BYTES', 512 * 1024 * 1024)))
+    cache = _caches.get(key)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(key, PdfCache(*key))
+    return cache
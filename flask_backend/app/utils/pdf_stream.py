@@ -0,0 +1,84 @@
+import zlib
+from typing import Dict, List, Tuple
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+# Minimal incremental PDF writer: every page is emitted as soon as it is built and
+# only byte offsets are kept, so documents of any length stream in constant memory.
+# Text uses the standard Helvetica fonts with WinAnsi encoding (no embedding).
+FONTS = {'F1': 'Helvetica', 'F2': 'Helvetica-Bold', 'F3': 'Helvetica-Oblique'}
+
+def _escape(text: str) -> bytes:
+    raw = text.encode('cp1252', errors='replace')
+    return raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+class StreamingPdfWriter:
+    CATALOG = 1
+    PAGES = 2
+
+    def __init__(self, page_size: Tuple[float, float], compress: bool = True):
+        self.width, self.height = page_size
+        self.compress = compress
+        self._offset = 0
+        self._offsets: Dict[int, int] = {}
+        self._next_id = 3
+        self._font_ids: Dict[str, int] = {}
+        self._page_ids: List[int] = []
+
+    def _alloc(self) -> int:
+        num = self._next_id
+        self._next_id += 1
+        return num
+
+    def _emit(self, data: bytes) -> bytes:
+        self._offset += len(data)
+        return data
+
+    def _object(self, num: int, body: bytes) -> bytes:
+        self._offsets[num] = self._offset
+        return self._emit(b'%d 0 obj\n' % num + body + b'\nendobj\n')
+
+    def begin(self) -> bytes:
+        out = [self._emit(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')]
+        for name, base in FONTS.items():
+            num = self._font_ids[name] = self._alloc()
+            out.append(self._object(num, f'<< /Type /Font /Subtype /Type1 /BaseFont /{base} /Encoding /WinAnsiEncoding >>'.encode('ascii')))
+        return b''.join(out)
+
+    def page(self, ops: List[bytes]) -> bytes:
+        content = b'\n'.join(ops)
+        stream_dict = b'<< /Length %d >>'
+        if self.compress:
+            content = zlib.compress(content)
+            stream_dict = b'<< /Length %d /Filter /FlateDecode >>'
+        content_id = self._alloc()
+        page_id = self._alloc()
+        self._page_ids.append(page_id)
+        fonts = ' '.join(f'/{name} {num} 0 R' for name, num in self._font_ids.items())
+        page = (f'<< /Type /Page /Parent {self.PAGES} 0 R /MediaBox [0 0 {self.width:.2f} {self.height:.2f}] '
+                f'/Resources << /Font << {fonts} >> >> /Contents {content_id} 0 R >>').encode('ascii')
+        return (self._object(content_id, stream_dict % len(content) + b'\nstream\n' + content + b'\nendstream')
+                + self._object(page_id, page))
+
+    def end(self) -> bytes:
+        kids = ' '.join(f'{num} 0 R' for num in self._page_ids)
+        out = [
+            self._object(self.PAGES, f'<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>'.encode('ascii')),
+            self._object(self.CATALOG, f'<< /Type /Catalog /Pages {self.PAGES} 0 R >>'.encode('ascii')),
+        ]
+        xref_offset = self._offset
+        size = self._next_id
+        xref = [b'xref\n0 %d\n' % size, b'0000000000 65535 f \n']
+        for num in range(1, size):
+            xref.append(b'%010d 00000 n \n' % self._offsets[num])
+        xref.append(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (size, self.CATALOG, xref_offset))
+        out.append(self._emit(b''.join(xref)))
+        return b''.join(out)
+
+def text(font: str, size: float, x: float, y: float, value: str) -> bytes:
+    return b'BT /%s %g Tf %.2f %.2f Td (' % (font.encode('ascii'), size, x, y) + _escape(value) + b') Tj ET'
+
+def text_right(font: str, size: float, right: float, y: float, value: str) -> bytes:
+    return text(font, size, right - stringWidth(value, FONTS[font], size), y, value)
+
+def line(x1: float, y1: float, x2: float, y2: float, width: float = 0.5) -> bytes:
+    return b'%.2f w %.2f %.2f m %.2f %.2f l S' % (width, x1, y1, x2, y2)
@@ -0,0 +1,72 @@
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import time
+import uuid
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+# Both tools hook in only when configured, so a disabled profiler or slow-query log
+# costs nothing per request or per statement.
+slow_query_logger = logging.getLogger('flask_backend.slow_query')
+
+_SAFE_ID = re.compile(r'[^A-Za-z0-9_.-]')
+
+def _profile_name() -> str:
+    # the correlation id comes from a client header: keep it a plain file name
+    cid = _SAFE_ID.sub('', getattr(request, 'correlation_id', ''))[:64].lstrip('.')
+    return cid or str(uuid.uuid4())
+
+def init_profiling(app):
+    # cProfile per request, for requests carrying PROFILE_HEADER or a PROFILE_SAMPLE_RATE
+    # sample; written to PROFILE_DIR/<correlation id>.prof (snakeviz, flameprof, pstats)
+    if not app.config.get('PROFILE_ENABLED'):
+        return
+    header = app.config.get('PROFILE_HEADER', 'X-Profile')
+    rate = float(app.config.get('PROFILE_SAMPLE_RATE', 0))
+
+    @app.before_request
+    def _start_profile():
+        if request.headers.get(header) or (rate > 0 and random.random() < rate):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def _stop_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        directory = current_app.config.get('PROFILE_DIR') or os.path.join(current_app.instance_path, 'profiles')
+        os.makedirs(directory, exist_ok=True)
+        name = _profile_name()
+        profiler.dump_stats(os.path.join(directory, f'{name}.prof'))
+        response.headers['X-Profile-Id'] = name
+        return response
+
+def _truncate(value, limit: int = 1000) -> str:
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+def log_slow_queries(engine, threshold_ms: float, with_parameters: bool = False):
+    threshold = threshold_ms / 1000.0
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_start = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - getattr(context, '_slow_query_start', time.perf_counter())
+        if elapsed < threshold:
+            return
+        slow_query_logger.warning(json.dumps({
+            'cid': getattr(request, 'correlation_id', '') if has_request_context() else '',
+            'duration_ms': round(elapsed * 1000, 3),
+            'statement': statement,
+            'parameters': _truncate(parameters) if with_parameters else None,
+            'executemany': executemany,
+        }))
@@ -0,0 +1,23 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+from flask import request
+from sqlalchemy import bindparam, String
+from werkzeug.exceptions import BadRequest
+
+def parse_date_arg(name: str) -> Optional[date]:
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise BadRequest(f'Invalid {name} date, expected YYYY-MM-DD')
+
+def created_between(query, column, start: Optional[date], end: Optional[date]):
+    # dates are bound as 'YYYY-MM-DD' text so they order correctly against SQLite's
+    # CURRENT_TIMESTAMP strings (and cast implicitly elsewhere); end is inclusive
+    if start:
+        query = query.filter(column >= bindparam(None, start.isoformat(), type_=String))
+    if end:
+        query = query.filter(column < bindparam(None, (end + timedelta(days=1)).isoformat(), type_=String))
+    return query
@@ -0,0 +1,96 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, Optional
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.sql.dml import UpdateBase
+from flask_backend.app.utils.jwt_utils import verify_token
+
+# Optional read replica (READ_REPLICA_URI, used as given: SQLite paths are not made
+# relative to the instance folder the way SQLALCHEMY_DATABASE_URI's are). Reads
+# made while serving a GET go to the replica, except:
+#   - anything after this request's session has written (it sees its own writes),
+#   - requests from a user who wrote anywhere within READ_REPLICA_LAG_SECONDS, so a
+#     balance read straight after a withdrawal never shows the pre-withdrawal value.
+# The "last write" times live in an mmap'd file of 8-byte slots indexed by user id,
+# shared by every worker; two users sharing a slot only costs extra primary reads.
+_SLOT = struct.Struct('d')
+
+class RecentWrites:
+    def __init__(self, path: str, slots: int):
+        self.slots = slots
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'ab') as f:
+                f.truncate(slots * _SLOT.size)
+        self._fd = os.open(path, os.O_RDWR)
+        self._map = mmap.mmap(self._fd, slots * _SLOT.size)
+
+    def mark(self, user_id: int, at: Optional[float] = None):
+        _SLOT.pack_into(self._map, (user_id % self.slots) * _SLOT.size, time.time() if at is None else at)
+
+    def last(self, user_id: int) -> float:
+        return _SLOT.unpack_from(self._map, (user_id % self.slots) * _SLOT.size)[0]
+
+def init_read_replica(app):
+    # kept out of SQLALCHEMY_BINDS: the replica holds the same tables, and a bind would
+    # give it its own metadata that create_all/drop_all would then try to manage
+    if app.config.get('READ_REPLICA_URI'):
+        app.extensions['read_replica'] = create_engine(app.config['READ_REPLICA_URI'], **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+
+_writes: Dict[tuple, RecentWrites] = {}
+_writes_lock = threading.Lock()
+
+def recent_writes() -> RecentWrites:
+    config = current_app.config
+    path = config.get('READ_REPLICA_WRITES_FILE') or os.path.join(current_app.instance_path, 'replica_writes.bin')
+    key = (path, int(config.get('READ_REPLICA_WRITES_SLOTS', 65536)))
+    store = _writes.get(key)
+    if store is None:
+        with _writes_lock:
+            store = _writes.setdefault(key, RecentWrites(*key))
+    return store
+
+def _request_user_id() -> Optional[int]:
+    # resolved from the token rather than g.identity: the identity query itself has to
+    # be routed, and a stale account row there is exactly what must not happen
+    if 'replica_user_id' not in g:
+        user_id = None
+        scheme, _, token = request.headers.get('Authorization', '').strip().partition(' ')
+        payload = verify_token(current_app.config, token.strip()) if scheme.lower() == 'bearer' and token.strip() else None
+        try:
+            user_id = int(payload.get('sub')) if payload else None
+        except (TypeError, ValueError):
+            pass
+        g.replica_user_id = user_id
+    return g.replica_user_id
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = current_app.extensions.get('read_replica') if bind is None else None
+        if replica is not None and self._use_replica(clause):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause) -> bool:
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info['wrote'] = True
+            return False
+        if self.info.get('wrote') or not has_request_context() or request.method not in ('GET', 'HEAD'):
+            return False
+        user_id = _request_user_id()
+        if user_id is None:
+            return True
+        lag = float(current_app.config.get('READ_REPLICA_LAG_SECONDS', 5))
+        return time.time() - recent_writes().last(user_id) >= lag
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _note_write(session):
+    if session.info.get('wrote') and has_request_context():
+        user_id = _request_user_id()
+        if user_id is not None:
+            recent_writes().mark(user_id)
@@ -0,0 +1,136 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Raised for a full queue, a job that outlives its timeout and a crashed worker
+# process alike: callers answer all three with 503 and a retry hint
+class WorkerPoolBusy(RuntimeError):
+    pass
+
+# Process pool with a hard cap on queued work, so a burst of CPU-heavy jobs is
+# rejected early instead of piling up behind the request workers.
+# workers <= 0 runs jobs inline in the calling thread (tests, single-core boxes).
+class BoundedPool:
+    def __init__(self, name: str, workers: int, max_pending: int):
+        self.name = name
+        self.workers = int(workers)
+        self.max_pending = max(int(max_pending), 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.max_pending_seen = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.broken = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: never fork a worker that may hold DB connections or locks
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def _reserve(self, n: int = 1):
+        with self._lock:
+            if self.pending + n > self.max_pending:
+                self.rejected += n
+                raise WorkerPoolBusy(f'{self.name} pool is busy')
+            self.pending += n
+            self.submitted += n
+            self.max_pending_seen = max(self.max_pending_seen, self.pending)
+
+    def _release(self, n: int = 1):
+        with self._lock:
+            self.pending -= n
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        # a worker process died: the executor is unusable, start a fresh one on next use
+        with self._lock:
+            self.broken += 1
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, fn: Callable, *args, timeout: Optional[float] = None):
+        self._reserve()
+        if self.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                self._release()
+        with self._lock:
+            executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError):
+            self._release()
+            self._discard(executor)
+            raise WorkerPoolBusy(f'{self.name} pool is restarting')
+        # the slot stays taken until the child has really finished, even after we stop waiting
+        future.add_done_callback(lambda _: self._release())
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            raise WorkerPoolBusy(f'{self.name} job timed out')
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise WorkerPoolBusy(f'{self.name} worker crashed')
+
+    def map(self, fn: Callable, items: Iterable, chunksize: int = 1) -> List:
+        items = list(items)
+        if not items:
+            return []
+        if self.workers <= 0:
+            return [fn(item) for item in items]
+        # batch jobs bypass the request queue cap but still count toward pending
+        with self._lock:
+            executor = self._get_executor()
+            self.pending += 1
+            self.submitted += len(items)
+        try:
+            return list(executor.map(fn, items, chunksize=max(chunksize, 1)))
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise WorkerPoolBusy(f'{self.name} worker crashed')
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'pending': self.pending,
+                'max_pending_seen': self.max_pending_seen,
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'broken': self.broken,
+            }
+
+    def shutdown(self):
+        # wait outside the lock: finishing jobs release their slot through it
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+_pools: Dict[str, BoundedPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(name: str, workers: int, max_pending: int) -> BoundedPool:
+    pool = _pools.get(name)
+    if pool is None or pool.workers != int(workers) or pool.max_pending != max(int(max_pending), 1):
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None or pool.workers != int(workers) or pool.max_pending != max(int(max_pending), 1):
+                if pool is not None:
+                    pool.shutdown()
+                pool = _pools[name] = BoundedPool(name, workers, max_pending)
+    return pool
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    return {name: pool.stats() for name, pool in list(_pools.items())}
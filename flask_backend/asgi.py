@@ -0,0 +1,148 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+from flask_backend.app import db
+from flask_backend.app.models.user import User
+from flask_backend.app.models.account import Account
+from flask_backend.app.models.transaction import Transaction
+from flask_backend.app.routes.account import balance_body
+from flask_backend.app.routes.auth import validate_body
+from flask_backend.app.routes.transactions import HISTORY_DEFAULT_LIMIT, history_item
+from flask_backend.app.utils.jwt_utils import verify_token
+from flask_backend.app.utils.pagination import keyset_statement, parse_limit, split_page
+from flask_backend.run import app as flask_app
+
+# Optional ASGI entry point (pip install -r flask_backend/requirements-asgi.txt):
+#
+#     uvicorn flask_backend.asgi:app --workers 2
+#
+# The hot read endpoints below run natively on the event loop with async database
+# access, so they keep answering while PDF renders or PIN checks hold threads.
+# Every other request (and any non-GET) goes to the unchanged Flask app through
+# asgiref's WSGI adapter, which runs it in a thread.
+_ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'mysql': 'mysql+aiomysql', 'postgresql': 'postgresql+asyncpg'}
+
+def async_database_uri(flask_app) -> str:
+    if flask_app.config.get('ASYNC_DATABASE_URI'):
+        return flask_app.config['ASYNC_DATABASE_URI']
+    # the sync engine's URL, after Flask-SQLAlchemy resolved relative SQLite paths
+    with flask_app.app_context():
+        url = db.engine.url
+    driver = _ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f'No async driver known for {url.drivername}; set ASYNC_DATABASE_URI')
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+class _Reply(Exception):
+    def __init__(self, status: int, body, headers: Optional[List[Tuple[str, str]]] = None):
+        self.status = status
+        self.body = body
+        self.headers = headers or []
+
+# built once; only the bound user id changes per request
+_IDENTITY = select(User, Account).outerjoin(Account, Account.user_id == User.id).where(User.id == bindparam('user_id')).limit(1)
+
+def _error(status: int, message: str) -> _Reply:
+    return _Reply(status, {'success': False, 'message': message})
+
+class AsyncReadApp:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.config = flask_app.config
+        self.wsgi = WsgiToAsgi(flask_app)
+        self._engine = None
+        self._sessions: Optional[async_sessionmaker] = None
+        self.routes = {
+            '/api/account/balance': self.balance,
+            '/api/transactions/history': self.history,
+            '/api/auth/validate': self.validate,
+        }
+
+    def sessions(self) -> async_sessionmaker:
+        if self._sessions is None:
+            self._engine = create_async_engine(async_database_uri(self.flask_app))
+            self._sessions = async_sessionmaker(self._engine, expire_on_commit=False)
+        return self._sessions
+
+    async def __call__(self, scope, receive, send):
+        handler = self.routes.get(scope.get('path')) if scope['type'] == 'http' and scope['method'] == 'GET' else None
+        if handler is None:
+            if scope['type'] == 'lifespan':
+                return await self._lifespan(receive, send)
+            return await self.wsgi(scope, receive, send)
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+        args = MultiDict(parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True))
+        try:
+            async with self.sessions()() as session:
+                reply = await handler(session, headers, args)
+        except _Reply as r:
+            reply = r
+        except HTTPException as e:
+            # same envelope as the Flask app's global error handler
+            reply = _Reply(e.code, {'success': False, 'error': {'code': e.code, 'message': e.description}})
+        except Exception as e:
+            logging.error(f"error code=500 path={scope.get('path')} msg={e}", exc_info=False)
+            reply = _Reply(500, {'success': False, 'error': {'code': 500, 'message': 'Internal server error'}})
+        await self._send(send, reply, headers.get('origin'))
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._engine is not None:
+                    await self._engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _send(self, send, reply: _Reply, origin: Optional[str]):
+        # rendered like jsonify so clients cannot tell which path served them
+        body = (self.flask_app.json.dumps(reply.body, separators=(',', ':')) + '\n').encode('utf-8')
+        headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        headers += [(k.encode('latin-1'), v.encode('latin-1')) for k, v in reply.headers]
+        if origin:
+            # mirrors the Flask-CORS settings for /api/* in create_app
+            headers += [(b'access-control-allow-origin', origin.encode('latin-1')), (b'access-control-allow-credentials', b'true'),
+                        (b'access-control-expose-headers', b'Content-Type, X-Next-Cursor'), (b'vary', b'Origin')]
+        await send({'type': 'http.response.start', 'status': reply.status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _identity(self, session: AsyncSession, headers: Dict[str, str]):
+        # the async twin of auth_utils.login_required: one outer-joined query for user and account
+        scheme, _, token = headers.get('authorization', '').strip().partition(' ')
+        payload = verify_token(self.config, token.strip()) if scheme.lower() == 'bearer' and token.strip() else None
+        if not payload or payload.get('type') != 'access':
+            raise _error(401, 'Invalid token')
+        try:
+            user_id = int(payload.get('sub'))
+        except (TypeError, ValueError):
+            raise _error(401, 'Invalid token')
+        row = (await session.execute(_IDENTITY, {'user_id': user_id})).first()
+        if row is None:
+            raise _error(401, 'Invalid token')
+        if row[1] is None:
+            raise _error(401, 'Session invalid')
+        return row[0], row[1]
+
+    async def balance(self, session, headers, args) -> _Reply:
+        _, account = await self._identity(session, headers)
+        return _Reply(200, balance_body(account))
+
+    async def validate(self, session, headers, args) -> _Reply:
+        user, account = await self._identity(session, headers)
+        return _Reply(200, validate_body(user, account))
+
+    async def history(self, session, headers, args) -> _Reply:
+        _, account = await self._identity(session, headers)
+        limit = parse_limit(args, HISTORY_DEFAULT_LIMIT, int(self.config.get('PAGINATION_MAX_LIMIT', 100)))
+        stmt = keyset_statement(select(Transaction).where(Transaction.account_id == account.id), Transaction, args, limit)
+        txs, next_cursor = split_page(list((await session.execute(stmt)).scalars()), limit)
+        return _Reply(200, [history_item(t) for t in txs], [('X-Next-Cursor', next_cursor)] if next_cursor else [])
+
+app = AsyncReadApp(flask_app)
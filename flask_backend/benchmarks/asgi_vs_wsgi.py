@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+READ_PATHS = ('/api/account/balance', '/api/transactions/history', '/api/auth/validate')
+SLOW_PATH = '/api/account/statement/pdf'
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+async def request(port: int, method: str, path: str, token: Optional[str] = None, body: Optional[Dict] = None) -> Tuple[int, bytes]:
+    # one connection per request: gunicorn's sync workers close after every response anyway
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    data = json.dumps(body).encode() if body is not None else b''
+    head = [f'{method} {path} HTTP/1.1', f'Host: 127.0.0.1:{port}', 'Connection: close', f'Content-Length: {len(data)}']
+    if token:
+        head.append(f'Authorization: Bearer {token}')
+    if body is not None:
+        head.append('Content-Type: application/json')
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + data)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    status = int(raw.split(b' ', 2)[1])
+    return status, raw.split(b'\r\n\r\n', 1)[1]
+
+def start_server(kind: str, port: int, workers: int, env: Dict[str, str]) -> subprocess.Popen:
+    if kind == 'wsgi':
+        cmd = [sys.executable, '-m', 'gunicorn', 'flask_backend.run:app', '-b', f'127.0.0.1:{port}', '-w', str(workers), '--backlog', '2048']
+    else:
+        cmd = [sys.executable, '-m', 'uvicorn', 'flask_backend.asgi:app', '--host', '127.0.0.1', '--port', str(port),
+               '--workers', str(workers), '--log-level', 'warning', '--no-access-log', '--backlog', '2048']
+    return subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+async def wait_ready(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await request(port, 'GET', '/api/account/balance')
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+async def load(port: int, clients: int, duration: float, slow_share: float) -> Dict:
+    status, body = await request(port, 'POST', '/api/auth/login', body={'account_number': '1234567890', 'pin': '1234'})
+    token = json.loads(body)['token']
+    await request(port, 'POST', '/api/transactions/deposit', token, {'amount': 10})
+    latencies: List[float] = []
+    slow_latencies: List[float] = []
+    errors = 0
+    stop = time.monotonic() + duration
+
+    async def client():
+        nonlocal errors
+        while time.monotonic() < stop:
+            slow = random.random() < slow_share
+            path = SLOW_PATH if slow else random.choice(READ_PATHS)
+            start = time.perf_counter()
+            try:
+                status, _ = await request(port, 'GET', path, token)
+            except OSError:
+                status = 0
+            elapsed = time.perf_counter() - start
+            if status != 200:
+                errors += 1
+            (slow_latencies if slow else latencies).append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    pct = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000 if latencies else float('nan')
+    return {
+        'requests': len(latencies) + len(slow_latencies),
+        'rps': (len(latencies) + len(slow_latencies)) / wall,
+        'read_p50_ms': pct(0.50),
+        'read_p99_ms': pct(0.99),
+        'errors': errors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Read endpoints under many concurrent clients: gunicorn (sync) vs. the ASGI entry point')
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--slow-share', type=float, default=0.05, help=f'fraction of requests to the slow {SLOW_PATH}')
+    parser.add_argument('--servers', default='wsgi,asgi')
+    args = parser.parse_args()
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=f'sqlite:///{db_path}', LOGIN_THROTTLE_ENABLED='false')
+    # create and seed the database once, so the workers do not race each other doing it
+    subprocess.run([sys.executable, '-c', 'import flask_backend.run'], env=env, check=True)
+    for kind in args.servers.split(','):
+        port = _free_port()
+        server = start_server(kind, port, args.workers, env)
+        try:
+            asyncio.run(wait_ready(port))
+            r = asyncio.run(load(port, args.clients, args.duration, args.slow_share))
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{kind}: {r['rps']:8.1f} req/s  read p50 {r['read_p50_ms']:7.1f} ms  read p99 {r['read_p99_ms']:7.1f} ms  "
+              f"({r['requests']} requests, {r['errors']} errors)")
+
+if __name__ == '__main__':
+    main()
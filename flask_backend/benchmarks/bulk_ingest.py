@@ -0,0 +1,51 @@
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+
+def run(rows: int, accounts: int, chunk_size: int) -> float:
+    from flask_backend.app import create_app, db
+    from flask_backend.app.models.user import User
+    from flask_backend.app.models.account import Account
+    from flask_backend.app.services.bulk_service import ingest_transactions
+
+    app = create_app()
+    app.config.update(BULK_CHUNK_SIZE=chunk_size, BULK_RESULTS_DIR=tempfile.mkdtemp())
+    numbers = [f'{8000000000 + i}' for i in range(accounts)]
+    with app.app_context():
+        user = User(name='Bench', email=f'bulk{random.random()}@example.com', phone='9000000002')
+        db.session.add(user)
+        db.session.flush()
+        existing = {n for (n,) in db.session.query(Account.account_number).filter(Account.account_number.in_(numbers))}
+        db.session.add_all(Account(user_id=user.id, account_number=n, pin_hash='x', balance=1000000, daily_limit=1000000)
+                           for n in numbers if n not in existing)
+        db.session.commit()
+
+    buf = io.StringIO()
+    buf.write('account_number,type,amount,description\n')
+    for _ in range(rows):
+        buf.write(f"{random.choice(numbers)},{random.choice(('deposit', 'withdrawal'))},{random.randint(1, 500)}.00,settlement\n")
+    buf.seek(0)
+    with app.app_context():
+        start = time.perf_counter()
+        summary = ingest_transactions(buf, 'csv')
+        elapsed = time.perf_counter() - start
+    if summary['rejected']:
+        print(f"  {summary['rejected']} rejected rows")
+    return rows / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk settlement ingestion throughput')
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--accounts', type=int, default=500)
+    parser.add_argument('--chunk-sizes', default='500,2000,5000')
+    args = parser.parse_args()
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    for size in (int(s) for s in args.chunk_sizes.split(',')):
+        print(f'chunk={size}: {run(args.rows, args.accounts, size):10.1f} rows/s')
+
+if __name__ == '__main__':
+    main()
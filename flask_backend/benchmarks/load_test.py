@@ -0,0 +1,213 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+PIN = '1234'
+INITIAL_BALANCE = Decimal('1000000.00')
+# relative weights of each operation in the traffic mix
+MIX = {'login': 2, 'balance': 30, 'history': 20, 'withdraw': 20, 'deposit': 20, 'receipt': 8}
+
+def _number(i: int) -> str:
+    return f'{6000000000 + i}'
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)] * 1000
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class Client:
+    # one keep-alive connection per thread, like a browser tab or an ATM terminal
+    def __init__(self, port: int):
+        self.port = port
+        self.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+
+    def call(self, method: str, path: str, token: Optional[str] = None, body: Optional[Dict] = None) -> Tuple[int, bytes]:
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        for attempt in range(2):
+            try:
+                self.conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+                resp = self.conn.getresponse()
+                return resp.status, resp.read()
+            except (http.client.HTTPException, OSError):
+                # the server closed our keep-alive connection: reconnect once
+                self.conn.close()
+                self.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+                if attempt:
+                    raise
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        # successful money movements as the clients saw them, per account number
+        self.net: Dict[str, Decimal] = defaultdict(Decimal)
+
+    def record(self, op: str, status: int, elapsed: float):
+        with self.lock:
+            self.latencies[op].append(elapsed)
+            self.statuses[op][status] += 1
+
+def worker(port: int, accounts: List[str], fanout: str, stop_at: float, recorder: Recorder, tokens: Dict[str, str]):
+    client = Client(port)
+    ops, weights = list(MIX), list(MIX.values())
+    while time.monotonic() < stop_at:
+        op = random.choices(ops, weights)[0]
+        number = accounts[0] if fanout == 'hot' else random.choice(accounts)
+        token = tokens[number]
+        amount = Decimal(random.randint(1, 100))
+        start = time.perf_counter()
+        if op == 'login':
+            status, body = client.call('POST', '/api/auth/login', body={'account_number': number, 'pin': PIN})
+            if status == 200:
+                tokens[number] = json.loads(body)['token']
+        elif op == 'balance':
+            status, _ = client.call('GET', '/api/account/balance', token)
+        elif op == 'history':
+            status, _ = client.call('GET', '/api/transactions/history?limit=20', token)
+        elif op == 'receipt':
+            status, _ = client.call('GET', '/api/receipts/latest/pdf', token)
+        else:
+            status, _ = client.call('POST', f'/api/transactions/{op}', token, {'amount': float(amount)})
+        elapsed = time.perf_counter() - start
+        recorder.record(op, status, elapsed)
+        if status == 200 and op in ('withdraw', 'deposit'):
+            with recorder.lock:
+                recorder.net[number] += amount if op == 'deposit' else -amount
+
+def seed(accounts: int, pin_hash_method: str):
+    from werkzeug.security import generate_password_hash
+    from flask_backend.app import create_app, db
+    from flask_backend.app.models.user import User
+    from flask_backend.app.models.account import Account
+    app = create_app()
+    with app.app_context():
+        pin_hash = generate_password_hash(PIN, method=pin_hash_method)
+        for i in range(accounts):
+            user = User(name=f'Load {i}', email=f'load{i}@example.com', phone='9000000004')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Account(user_id=user.id, account_number=_number(i), pin_hash=pin_hash,
+                                   balance=INITIAL_BALANCE, daily_limit=Decimal('1000000000.00')))
+        db.session.commit()
+    return app
+
+def check_invariants(app, numbers: List[str], net: Dict[str, Decimal]) -> List[str]:
+    # the database must agree with itself and with what the clients were told
+    from sqlalchemy import func
+    from flask_backend.app import db
+    from flask_backend.app.models.account import Account
+    from flask_backend.app.models.transaction import Transaction
+    violations = []
+    with app.app_context():
+        for number in numbers:
+            account = Account.query.filter_by(account_number=number).one()
+            deposits = db.session.query(func.coalesce(func.sum(Transaction.amount), 0)).filter_by(account_id=account.id, type='deposit').scalar()
+            withdrawals = db.session.query(func.coalesce(func.sum(Transaction.amount), 0)).filter_by(account_id=account.id, type='withdrawal').scalar()
+            last = Transaction.query.filter_by(account_id=account.id).order_by(Transaction.id.desc()).first()
+            balance = Decimal(str(account.balance))
+            ledger = INITIAL_BALANCE + Decimal(str(deposits)) - Decimal(str(withdrawals))
+            if balance != ledger:
+                violations.append(f'{number}: balance {balance} != initial + deposits - withdrawals {ledger}')
+            if balance != INITIAL_BALANCE + net.get(number, Decimal(0)):
+                violations.append(f'{number}: balance {balance} != initial + acknowledged movements {INITIAL_BALANCE + net.get(number, Decimal(0))}')
+            if last is not None and Decimal(str(last.balance_after)) != balance:
+                violations.append(f'{number}: last balance_after {last.balance_after} != balance {balance}')
+            if balance < 0:
+                violations.append(f'{number}: negative balance {balance}')
+    return violations
+
+def run(args) -> Dict:
+    from werkzeug.serving import make_server
+    app = seed(args.accounts, args.pin_hash_method)
+    app.config.update(LOGIN_THROTTLE_ENABLED=False, PIN_HASH_METHOD=args.pin_hash_method)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    port = server.server_port
+    numbers = [_number(i) for i in range(args.accounts)]
+    login = Client(port)
+    tokens = {n: json.loads(login.call('POST', '/api/auth/login', body={'account_number': n, 'pin': PIN})[1])['token'] for n in numbers}
+    recorder = Recorder()
+    stop_at = time.monotonic() + args.duration
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(port, numbers, args.fanout, stop_at, recorder, tokens)) for _ in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    server.shutdown()
+
+    operations = {}
+    for op, values in sorted(recorder.latencies.items()):
+        values.sort()
+        operations[op] = {
+            'requests': len(values),
+            'rps': len(values) / wall,
+            'p50_ms': _percentile(values, 0.50),
+            'p95_ms': _percentile(values, 0.95),
+            'p99_ms': _percentile(values, 0.99),
+            'statuses': {str(k): v for k, v in sorted(recorder.statuses[op].items())},
+        }
+    writes = sum(operations.get(op, {}).get('requests', 0) for op in ('withdraw', 'deposit'))
+    conflicts = sum(recorder.statuses[op].get(409, 0) for op in ('withdraw', 'deposit'))
+    total = sum(o['requests'] for o in operations.values())
+    return {
+        'commit': _git_commit(),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {'threads': args.threads, 'duration': args.duration, 'accounts': args.accounts, 'fanout': args.fanout, 'mix': MIX,
+                   'database': os.environ.get('SQLALCHEMY_DATABASE_URI')},
+        'total': {'requests': total, 'rps': total / wall,
+                  'errors_5xx': sum(c for s in recorder.statuses.values() for code, c in s.items() if code >= 500)},
+        'conflict_rate': conflicts / writes if writes else 0.0,
+        'operations': operations,
+        'invariant_violations': check_invariants(app, numbers, recorder.net),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent mixed traffic against a local server on a file-backed database')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--accounts', type=int, default=50)
+    parser.add_argument('--fanout', choices=('hot', 'uniform'), default='uniform', help='hot: every thread uses one account')
+    parser.add_argument('--pin-hash-method', default='pbkdf2:sha256:1000', help='cheap by default so logins do not dominate the mix')
+    parser.add_argument('--db', help='SQLite file to use (default: a fresh temporary file)')
+    parser.add_argument('--output', help='where to write the JSON results (default: load-<commit>-<fanout>.json)')
+    args = parser.parse_args()
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), 'load.db')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.abspath(db_path)}'
+    os.environ['LOGIN_THROTTLE_ENABLED'] = 'false'
+    result = run(args)
+    output = args.output or f"load-{result['commit'] or 'unknown'}-{args.fanout}.json"
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"{result['total']['requests']} requests, {result['total']['rps']:.1f} req/s, "
+          f"409 rate {result['conflict_rate']:.2%}, {result['total']['errors_5xx']} 5xx")
+    for op, o in result['operations'].items():
+        print(f"  {op:9s} {o['requests']:6d}  p50 {o['p50_ms']:7.1f} ms  p95 {o['p95_ms']:7.1f} ms  p99 {o['p99_ms']:7.1f} ms  {o['statuses']}")
+    for violation in result['invariant_violations']:
+        print(f'  INVARIANT VIOLATED: {violation}')
+    print(f'results written to {output}')
+    if result['invariant_violations']:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
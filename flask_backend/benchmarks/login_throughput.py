@@ -0,0 +1,59 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+def run(pool_size: int, clients: int, logins: int, method: str) -> float:
+    from flask_backend.app import create_app, db
+    from flask_backend.app.models.user import User
+    from flask_backend.app.models.account import Account
+    from flask_backend.app.utils.worker_pool import get_pool
+    from werkzeug.security import generate_password_hash
+
+    app = create_app()
+    app.config.update(PIN_HASH_WORKERS=pool_size, PIN_HASH_METHOD=method, PIN_HASH_MAX_PENDING=max(clients, 1), LOGIN_THROTTLE_ENABLED=False)
+    with app.app_context():
+        if not Account.query.filter_by(account_number='9000000001').first():
+            user = User(name='Bench', email='bench@example.com', phone='9000000001')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Account(user_id=user.id, account_number='9000000001', pin_hash=generate_password_hash('1234', method=method), balance=0))
+            db.session.commit()
+        get_pool('pin', pool_size, max(clients, 1)).run(len, 'warm')
+
+    per_client = max(logins // clients, 1)
+    errors = []
+
+    def client_loop():
+        client = app.test_client()
+        for _ in range(per_client):
+            r = client.post('/api/auth/login', json={'account_number': '9000000001', 'pin': '1234'})
+            if r.status_code != 200:
+                errors.append(r.status_code)
+
+    threads = [threading.Thread(target=client_loop) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        print(f'  {len(errors)} failed logins: {sorted(set(errors))}')
+    return per_client * clients / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Login throughput at different PIN hashing pool sizes')
+    parser.add_argument('--pool-sizes', default='0,1,2,4', help='comma-separated PIN_HASH_WORKERS values (0 = inline)')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--method', default='scrypt:32768:8:1')
+    args = parser.parse_args()
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    for size in (int(s) for s in args.pool_sizes.split(',')):
+        print(f'pool={size}: {run(size, args.clients, args.logins, args.method):8.1f} logins/s')
+
+if __name__ == '__main__':
+    main()
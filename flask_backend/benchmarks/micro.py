@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Dict, List
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'micro_baseline.json')
+
+def measure(fn: Callable, warmup: float, repeats: int, target: float) -> Dict[str, float]:
+    # warm caches, lazy imports and allocator pools first
+    deadline = time.perf_counter() + warmup
+    while time.perf_counter() < deadline:
+        fn()
+    # calibrate so one repeat takes about `target` seconds, then time each repeat
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= target / 10 or number >= 1 << 20:
+            break
+        number *= 2
+    number = max(1, int(target * number / max(elapsed, 1e-9)))
+    samples: List[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return {
+        'median_us': statistics.median(samples),
+        'mean_us': statistics.fmean(samples),
+        'stdev_us': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'min_us': min(samples),
+        'max_us': max(samples),
+        'iterations': number * repeats,
+    }
+
+def benchmarks() -> Dict[str, Callable]:
+    from werkzeug.security import check_password_hash, generate_password_hash
+    from flask import jsonify
+    from flask_backend.app import create_app
+    from flask_backend.app.models.receipt import Receipt
+    from flask_backend.app.models.transaction import Transaction
+    from flask_backend.app.routes.transactions import transaction_body
+    from flask_backend.app.schemas import AmountSchema
+    from flask_backend.app.services.pdf_service import render_receipt
+    from flask_backend.app.utils.jwt_utils import create_access_token, verify_token
+
+    app = create_app()
+    config = dict(app.config)
+    uncached = dict(config, JWT_VERIFY_CACHE_SIZE=0)
+    token = create_access_token(config, 1)
+    pin_hash = generate_password_hash('1234', method=config['PIN_HASH_METHOD'])
+    created = datetime(2024, 1, 2, 3, 4, 5)
+    tx = Transaction(id=42, account_id=7, type='withdrawal', amount=Decimal('500.00'), balance_after=Decimal('9500.00'),
+                     description='ATM Withdrawal', created_at=created)
+    receipt = Receipt(id=42, transaction_id=42, receipt_number='RCP2024010203040542', content='', created_at=created)
+    fields = {'receipt_number': receipt.receipt_number, 'date': '2024-01-02 03:04:05', 'account': '****3333',
+              'name': 'Bench User', 'transaction': 'Withdrawal', 'amount': '₹500.00', 'balance_after': '₹9,500.00'}
+    ctx = app.test_request_context()
+    ctx.push()
+
+    def jsonify_transaction():
+        return jsonify(transaction_body(tx, receipt)).get_data()
+
+    def verify_cached():
+        verify_token(config, token)
+
+    def verify_uncached():
+        verify_token(uncached, token)
+
+    return {
+        'create_access_token': lambda: create_access_token(config, 1),
+        'verify_token_cached': verify_cached,
+        'verify_token_uncached': verify_uncached,
+        'check_password_hash': lambda: check_password_hash(pin_hash, '1234'),
+        'render_receipt': lambda: render_receipt(fields),
+        'amount_schema_load': lambda: AmountSchema().load({'amount': 500}),
+        'transaction_body': lambda: transaction_body(tx, receipt),
+        'jsonify_transaction': jsonify_transaction,
+    }
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    # compared on the fastest repeat: background noise only ever adds time
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base and r['min_us'] > base['min_us'] * (1 + threshold):
+            regressions.append(f"{name}: {r['min_us']:.1f} us vs baseline {base['min_us']:.1f} us "
+                               f"(+{(r['min_us'] / base['min_us'] - 1):.0%}, threshold {threshold:.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmarks of the per-request hot functions, checked against a baseline')
+    parser.add_argument('--only', help='comma-separated benchmark names')
+    parser.add_argument('--warmup', type=float, default=0.5, help='seconds of warmup per benchmark')
+    parser.add_argument('--repeats', type=int, default=7)
+    parser.add_argument('--target', type=float, default=0.2, help='approximate seconds per repeat')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='write these results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown of the fastest repeat before failing')
+    args = parser.parse_args()
+    os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+
+    selected = benchmarks()
+    if args.only:
+        wanted = args.only.split(',')
+        unknown = set(wanted) - set(selected)
+        if unknown:
+            parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+        selected = {name: selected[name] for name in wanted}
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('results', {})
+
+    results = {}
+    for name, fn in selected.items():
+        r = results[name] = measure(fn, args.warmup, args.repeats, args.target)
+        base = baseline.get(name)
+        change = f"  {r['min_us'] / base['min_us'] - 1:+7.1%}" if base else ''
+        print(f"{name:24s} median {r['median_us']:11.2f} us  stdev {r['stdev_us']:9.2f}  min {r['min_us']:11.2f}{change}")
+
+    if args.save_baseline:
+        merged = dict(baseline, **results)
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': merged}, f, indent=2)
+        print(f'baseline written to {args.baseline}')
+        return
+    if not baseline:
+        print(f'no baseline at {args.baseline}; run with --save-baseline to create one')
+        return
+    regressions = compare(results, baseline, args.threshold)
+    for line in regressions:
+        print(f'REGRESSION {line}')
+    if regressions:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from flask_backend.app.services.pdf_service import render_receipt
+
+def sample_fields(i: int):
+    return {
+        'receipt_number': f'RCP20240101120000{i}',
+        'date': '2024-01-01 12:00:00',
+        'account': '****7890',
+        'name': 'John Doe',
+        'transaction': 'Withdrawal',
+        'amount': f'₹{1000 + i:,.2f}',
+        'balance_after': f'₹{50000 - i:,.2f}',
+    }
+
+def run_inline(count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        render_receipt(sample_fields(i))
+    return count / (time.perf_counter() - start)
+
+def run_pool(count: int, processes: int) -> float:
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn')) as pool:
+        list(pool.map(render_receipt, [sample_fields(i) for i in range(processes)]))  # warm the workers
+        start = time.perf_counter()
+        list(pool.map(render_receipt, [sample_fields(i) for i in range(count)], chunksize=16))
+        return count / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description='Receipt PDF renders per second, inline vs. a process pool')
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+    render_receipt(sample_fields(0))
+    print(f'1 process : {run_inline(args.count):8.1f} renders/s')
+    print(f'{args.processes} processes: {run_pool(args.count, args.processes):8.1f} renders/s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Dict
+
+PIN = '1234'
+
+def _app(env: Dict[str, str]):
+    # Config reads the environment at import time, so this must run in a fresh process
+    os.environ.update(env)
+    from flask_backend.app import create_app
+    return create_app()
+
+def seed(env: Dict[str, str], accounts: int):
+    from werkzeug.security import generate_password_hash
+    app = _app(env)
+    from flask_backend.app import db
+    from flask_backend.app.models.user import User
+    from flask_backend.app.models.account import Account
+    with app.app_context():
+        pin_hash = generate_password_hash(PIN, method='pbkdf2:sha256:1000')
+        for i in range(accounts):
+            user = User(name=f'Bench {i}', email=f'sqlite{i}@example.com', phone='9000000003')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Account(user_id=user.id, account_number=f'{7000000000 + i}', pin_hash=pin_hash, balance=1000000, daily_limit=1000000))
+        db.session.commit()
+
+def worker(env: Dict[str, str], role: str, account: int, start_at: float, duration: float, results):
+    app = _app(env)
+    client = app.test_client()
+    token = client.post('/api/auth/login', json={'account_number': f'{7000000000 + account}', 'pin': PIN}).get_json()['token']
+    headers = {'Authorization': f'Bearer {token}'}
+    ok = errors = 0
+    time.sleep(max(0.0, start_at - time.time()))
+    stop = time.time() + duration
+    while time.time() < stop:
+        if role == 'write':
+            r = client.post('/api/transactions/deposit', json={'amount': 1}, headers=headers)
+        else:
+            r = client.get('/api/transactions/history?limit=20', headers=headers)
+        if r.status_code == 200:
+            ok += 1
+        else:
+            errors += 1
+    results.put((role, ok, errors))
+
+def run(tuned: bool, writers: int, readers: int, duration: float) -> Dict[str, float]:
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    env = {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'LOGIN_THROTTLE_ENABLED': 'false',
+        'SQLITE_TUNING_ENABLED': 'true' if tuned else 'false',
+    }
+    ctx = multiprocessing.get_context('spawn')
+    p = ctx.Process(target=seed, args=(env, writers + readers))
+    p.start()
+    p.join()
+    results = ctx.Queue()
+    start_at = time.time() + 5
+    procs = [ctx.Process(target=worker, args=(env, 'write', i, start_at, duration, results)) for i in range(writers)]
+    procs += [ctx.Process(target=worker, args=(env, 'read', writers + i, start_at, duration, results)) for i in range(readers)]
+    for proc in procs:
+        proc.start()
+    totals = {'write': 0, 'read': 0, 'errors': 0}
+    for _ in procs:
+        role, ok, errors = results.get()
+        totals[role] += ok
+        totals['errors'] += errors
+    for proc in procs:
+        proc.join()
+    return {'writes_per_s': totals['write'] / duration, 'reads_per_s': totals['read'] / duration, 'errors': totals['errors']}
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent deposits and history reads from several processes on one SQLite file')
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+    for tuned in (False, True):
+        r = run(tuned, args.writers, args.readers, args.duration)
+        label = 'tuned  ' if tuned else 'default'
+        print(f"{label}: {r['writes_per_s']:8.1f} writes/s  {r['reads_per_s']:8.1f} reads/s  {r['errors']} errors")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import argparse
+import io
+import os
+import tempfile
+import time
+
+def run(rows: int, workers: int, method: str, offset: int) -> float:
+    from flask_backend.app import create_app
+    from flask_backend.app.services.bulk_service import import_users
+
+    app = create_app()
+    app.config.update(BULK_PIN_HASH_WORKERS=workers, PIN_HASH_METHOD=method, BULK_RESULTS_DIR=tempfile.mkdtemp())
+    buf = io.StringIO()
+    buf.write('name,email,phone,account_number,pin\n')
+    for i in range(offset, offset + rows):
+        buf.write(f'User {i},user{i}@example.com,9{i % 1000000000:09d},{6000000000 + i},{1000 + i % 9000}\n')
+    buf.seek(0)
+    with app.app_context():
+        start = time.perf_counter()
+        summary = import_users(buf, 'csv')
+        elapsed = time.perf_counter() - start
+    if summary['rejected']:
+        print(f"  {summary['rejected']} rejected rows")
+    return rows / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk user import throughput at different PIN hashing pool sizes')
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--workers', default=f'0,{os.cpu_count() or 1}', help='comma-separated BULK_PIN_HASH_WORKERS values (0 = inline)')
+    parser.add_argument('--method', default='scrypt:32768:8:1')
+    args = parser.parse_args()
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    for n, workers in enumerate(int(w) for w in args.workers.split(',')):
+        rate = run(args.rows, workers, args.method, n * args.rows)
+        print(f'workers={workers}: {rate:8.1f} accounts/s ({100000 / rate / 60:.1f} min per 100k)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+import json
+from flask_backend.app import create_app, db
+from flask_backend.app.models.user import User
+from flask_backend.app.models.account import Account
+from werkzeug.security import generate_password_hash
+
+def setup_app():
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'LOGIN_THROTTLE_ENABLED': False})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        u = User(name='Cust', email='cust@example.com', phone='9999999999')
+        admin = User(name='Admin', email='admin@example.com', phone='8888888888', role='admin')
+        db.session.add_all([u, admin])
+        db.session.flush()
+        db.session.add(Account(user_id=u.id, account_number='4444444444', pin_hash=generate_password_hash('1234'), balance=10000.0, daily_limit=5000.0))
+        db.session.add(Account(user_id=admin.id, account_number='5555555555', pin_hash=generate_password_hash('9999'), balance=0.0))
+        db.session.commit()
+    return app
+
+def auth_headers(client, account_number, pin):
+    r = client.post('/api/auth/login', json={'account_number': account_number, 'pin': pin})
+    return {'Authorization': f"Bearer {r.get_json()['token']}"}
+
+def test_export_streams_filtered_transactions():
+    app = setup_app()
+    client = app.test_client()
+    cust = auth_headers(client, '4444444444', '1234')
+    admin = auth_headers(client, '5555555555', '9999')
+    for amount in (100, 200, 300):
+        client.post('/api/transactions/deposit', json={'amount': amount}, headers=cust)
+    client.post('/api/transactions/withdraw', json={'amount': 50}, headers=cust)
+
+    assert client.get('/api/admin/transactions/export', headers=cust).status_code == 403
+    resp = client.get('/api/admin/transactions/export?type=deposit', headers=admin)
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    rows = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [r['amount'] for r in rows] == [100.0, 200.0, 300.0]
+
+    csv_resp = client.get('/api/admin/transactions/export?format=csv&from=2000-01-01', headers=admin)
+    lines = csv_resp.get_data(as_text=True).strip().splitlines()
+    assert lines[0].startswith('id,account_id,type')
+    assert len(lines) == 5
+    assert client.get('/api/admin/transactions/export?from=yesterday', headers=admin).status_code == 400
+
+def test_daily_aggregates_follow_transactions_and_backfill():
+    from flask_backend.app.models.daily_aggregate import DailyAggregate
+    app = setup_app()
+    client = app.test_client()
+    cust = auth_headers(client, '4444444444', '1234')
+    admin = auth_headers(client, '5555555555', '9999')
+    for amount in (100, 250):
+        client.post('/api/transactions/deposit', json={'amount': amount}, headers=cust)
+    client.post('/api/transactions/withdraw', json={'amount': 40}, headers=cust)
+
+    assert client.get('/api/admin/summary', headers=cust).status_code == 403
+    data = client.get('/api/admin/summary', headers=admin).get_json()
+    assert data['totals'] == {'deposit': {'count': 2, 'amount': 350.0}, 'withdrawal': {'count': 1, 'amount': 40.0}}
+    assert {d['type'] for d in data['days']} == {'deposit', 'withdrawal'}
+    assert client.get('/api/admin/summary?account_id=999', headers=admin).get_json()['totals'] == {}
+    assert client.get('/api/admin/summary?from=2020-01-01&to=2019-01-01', headers=admin).status_code == 400
+
+    with app.app_context():
+        before = sorted((a.account_id, a.day, a.type, a.count, float(a.amount)) for a in DailyAggregate.query)
+        DailyAggregate.query.delete()
+        db.session.commit()
+    result = app.test_cli_runner().invoke(args=['backfill-aggregates'])
+    assert '2 aggregate row(s) written' in result.output
+    with app.app_context():
+        after = sorted((a.account_id, a.day, a.type, a.count, float(a.amount)) for a in DailyAggregate.query)
+    assert after == before
+
+def test_stats_buckets_and_memoizes_completed_buckets():
+    from datetime import datetime, timedelta
+    from sqlalchemy import event
+    from flask_backend.app.models.transaction import Transaction
+    from flask_backend.app.services.aggregate_service import rebuild_daily_aggregates
+    app = setup_app()
+    client = app.test_client()
+    cust = auth_headers(client, '4444444444', '1234')
+    admin = auth_headers(client, '5555555555', '9999')
+    past = (datetime.utcnow() - timedelta(days=2)).replace(hour=10, minute=15, second=0, microsecond=0)
+    day = past.date().isoformat()
+    with app.app_context():
+        ids = [a.id for a in Account.query.order_by(Account.id)]
+        for account_id, tx_type, amount in ((ids[0], 'deposit', 100), (ids[0], 'withdrawal', 30), (ids[1], 'deposit', 70)):
+            db.session.add(Transaction(account_id=account_id, type=tx_type, amount=amount, balance_after=0, created_at=past))
+        db.session.commit()
+        rebuild_daily_aggregates()
+    client.post('/api/transactions/deposit', json={'amount': 5}, headers=cust)
+
+    assert client.get('/api/admin/stats?bucket=month', headers=admin).status_code == 400
+    assert client.get('/api/admin/stats', headers=cust).status_code == 403
+    daily = {b['start'][:10]: b for b in client.get('/api/admin/stats?bucket=day', headers=admin).get_json()['buckets']}
+    assert daily[day]['active_accounts'] == 2
+    assert daily[day]['types']['deposit'] == {'count': 2, 'amount': 170.0, 'accounts': 2}
+    assert daily[datetime.utcnow().date().isoformat()]['types']['deposit']['count'] == 1
+
+    url = f'/api/admin/stats?bucket=hour&from={day}&to={day}'
+    hourly = client.get(url, headers=admin).get_json()['buckets']
+    assert len(hourly) == 24
+    assert hourly[10]['types']['withdrawal'] == {'count': 1, 'amount': 30.0, 'accounts': 1}
+    with app.app_context():
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            assert client.get(url, headers=admin).get_json()['buckets'] == hourly
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+    assert not [s for s in statements if 'transactions' in s]
+
+def test_bulk_ingest_applies_rules_and_writes_results(tmp_path):
+    from flask_backend.app.models.transaction import Transaction
+    from flask_backend.app.models.receipt import Receipt
+    from flask_backend.app.models.daily_aggregate import DailyAggregate
+    app = setup_app()
+    app.config.update(BULK_RESULTS_DIR=str(tmp_path), BULK_CHUNK_SIZE=3)
+    client = app.test_client()
+    admin = auth_headers(client, '5555555555', '9999')
+    batch = '\n'.join([
+        'account_number,type,amount,description',
+        '4444444444,deposit,500,branch 1',
+        '4444444444,withdrawal,4000,',
+        '4444444444,withdrawal,2000,',          # over the 5000 daily limit after the 4000
+        '1234567890,deposit,10,',               # unknown account
+        '4444444444,deposit,-5,',
+        '5555555555,withdrawal,1,',             # insufficient balance
+        '5555555555,deposit,25.50,',
+    ])
+    resp = client.post('/api/admin/transactions/bulk', data=batch, content_type='text/csv', headers=admin)
+    body = resp.get_json()
+    assert resp.status_code == 200 and (body['applied'], body['rejected']) == (3, 4)
+    results = [json.loads(line) for line in client.get(f"/api/admin/transactions/bulk/{body['batch_id']}", headers=admin).get_data(as_text=True).splitlines()]
+    assert [r['row'] for r in results] == list(range(1, 8))
+    assert [r.get('reason') for r in results if r['status'] == 'rejected'] == ['Daily limit exceeded', 'Account not found', 'Invalid amount', 'Insufficient balance']
+    assert results[1]['balance_after'] == 6500.0
+    with app.app_context():
+        accs = {a.account_number: a for a in Account.query}
+        assert float(accs['4444444444'].balance) == 6500.0
+        assert float(accs['4444444444'].daily_withdrawn) == 4000.0
+        assert float(accs['5555555555'].balance) == 25.5
+        assert Transaction.query.count() == 3
+        assert {r.receipt_number for r in Receipt.query} == {r['receipt_number'] for r in results if r['status'] == 'applied'}
+        assert sum(a.count for a in DailyAggregate.query) == 3
+    # the account can still be used normally afterwards (versions were bumped consistently)
+    cust = auth_headers(client, '4444444444', '1234')
+    assert client.post('/api/transactions/withdraw', json={'amount': 1000}, headers=cust).status_code == 200
+    ndjson = '{"account_number": "4444444444", "type": "deposit", "amount": 1}\nnot json\n'
+    body = client.post('/api/admin/transactions/bulk', data=ndjson, content_type='application/x-ndjson', headers=admin).get_json()
+    assert (body['applied'], body['rejected']) == (1, 1)
+
+def test_bulk_user_import_checks_duplicates_and_hashes_pins(tmp_path):
+    from sqlalchemy import event
+    app = setup_app()
+    app.config.update(BULK_RESULTS_DIR=str(tmp_path), BULK_IMPORT_CHUNK_SIZE=3, BULK_PIN_HASH_WORKERS=0, PIN_HASH_METHOD='pbkdf2:sha256:1000',
+                      LOGIN_THROTTLE_ENABLED=True, LOGIN_THROTTLE_DB=str(tmp_path / 'throttle.db'))
+    client = app.test_client()
+    admin = auth_headers(client, '5555555555', '9999')
+    # probed before it exists: now in the negative cache
+    assert client.post('/api/auth/login', json={'account_number': '7000000006', 'pin': '6666'}).get_json()['message'] == 'Account not found'
+    batch = '\n'.join([
+        'name,email,phone,account_number,pin',
+        'Asha,asha@example.com,9000000001,7000000001,1111',
+        'Ravi,cust@example.com,9000000002,7000000002,2222',       # email taken
+        'Meera,meera@example.com,9000000003,4444444444,3333',    # account number taken
+        'Dev,dev@example.com,900,7000000004,4444',                # bad phone
+        'Asha Two,asha@example.com,9000000005,7000000005,5555',  # repeated in file
+        'Kiran,kiran@example.com,9000000006,7000000006,6666',
+    ])
+    statements = []
+    with app.app_context():
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        body = client.post('/api/admin/users/bulk', data=batch, content_type='text/csv', headers=admin).get_json()
+    finally:
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', listener)
+    assert (body['accepted'], body['rejected']) == (2, 4)
+    # per chunk: one duplicate query, one users insert, one accounts insert
+    assert sum('UNION ALL' in s for s in statements) == 2
+    results = [json.loads(line) for line in (tmp_path / body['result_file']).read_text().splitlines()]
+    assert [r.get('reason') for r in results] == [None, 'Email already exists', 'Account number already exists', 'Invalid phone', 'Email repeated in batch', None]
+    assert client.post('/api/auth/login', json={'account_number': '7000000006', 'pin': '6666'}).status_code == 200
+    with app.app_context():
+        acc = Account.query.filter_by(account_number='7000000001').first()
+        assert acc.pin_hash.startswith('pbkdf2:sha256:1000$') and acc.user_id == results[0]['user_id']
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import pytest
+from flask_backend.app import create_app, db
+from flask_backend.app.models.user import User
+from flask_backend.app.models.account import Account
+from werkzeug.security import generate_password_hash
+
+pytest.importorskip('aiosqlite')
+pytest.importorskip('asgiref')
+
+def setup_app(tmp_path):
+    # a file, not :memory:, so the async engine sees the same database
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'asgi.db'}", 'LOGIN_THROTTLE_ENABLED': False})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        u = User(name='Async', email='async@example.com', phone='9999999999')
+        db.session.add(u)
+        db.session.flush()
+        db.session.add(Account(user_id=u.id, account_number='666677778888', pin_hash=generate_password_hash('1234'), balance=500.0))
+        db.session.commit()
+    return app
+
+async def call(app, method, path, headers=None, body=b''):
+    query = b''
+    if '?' in path:
+        path, query = path.split('?', 1)
+        query = query.encode()
+    headers = dict(headers or {}, **({'Content-Length': str(len(body))} if body else {}))
+    scope = {'type': 'http', 'method': method, 'path': path, 'raw_path': path.encode(), 'query_string': query,
+             'headers': [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+             'http_version': '1.1', 'scheme': 'http', 'server': ('test', 80), 'client': ('127.0.0.1', 1234), 'root_path': ''}
+    sent = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    messages = []
+
+    async def receive():
+        return sent.pop(0) if sent else {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = next(m for m in messages if m['type'] == 'http.response.start')
+    data = b''.join(m.get('body', b'') for m in messages if m['type'] == 'http.response.body')
+    return start['status'], {k.decode().lower(): v.decode() for k, v in start['headers']}, data
+
+def test_async_read_endpoints_match_flask_views(tmp_path, monkeypatch):
+    from flask_backend.app.config import Config
+    # importing asgi builds and seeds the run.py app; keep it off instance/atm.db
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'run.db'}")
+    from flask_backend.asgi import AsyncReadApp
+    app = setup_app(tmp_path)
+    client = app.test_client()
+    token = client.post('/api/auth/login', json={'account_number': '666677778888', 'pin': '1234'}).get_json()['token']
+    auth = {'Authorization': f'Bearer {token}'}
+    asgi = AsyncReadApp(app)
+
+    async def scenario():
+        # non-native routes fall through to the Flask app unchanged
+        status, _, body = await call(asgi, 'POST', '/api/transactions/deposit', {**auth, 'Content-Type': 'application/json'}, b'{"amount": 25}')
+        assert status == 200 and json.loads(body)['new_balance'] == 525.0
+        for _ in range(2):
+            await call(asgi, 'POST', '/api/transactions/withdraw', {**auth, 'Content-Type': 'application/json'}, b'{"amount": 5}')
+        results = {}
+        for path in ('/api/account/balance', '/api/auth/validate', '/api/transactions/history?limit=2', '/api/transactions/history?cursor=%%%'):
+            results[path] = await call(asgi, 'GET', path, {**auth, 'Origin': 'http://localhost:5173'})
+        results['anon'] = await call(asgi, 'GET', '/api/account/balance')
+        await asgi._engine.dispose()
+        return results
+
+    results = asyncio.run(scenario())
+    for path, (status, headers, body) in results.items():
+        if path == 'anon':
+            expected = client.get('/api/account/balance')
+        else:
+            expected = client.get(path, headers=auth)
+            assert headers['access-control-allow-origin'] == 'http://localhost:5173'
+        assert status == expected.status_code
+        assert body == expected.get_data()
+        assert headers.get('x-next-cursor') == expected.headers.get('X-Next-Cursor')
+    assert results['/api/transactions/history?limit=2'][1]['x-next-cursor']
@@ -4,8 +4,7 @@ from flask_backend.app.models.account import Account
 from werkzeug.security import generate_password_hash
 
 def setup_app():
-    app = create_app()
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'LOGIN_THROTTLE_ENABLED': False})
     with app.app_context():
         db.drop_all()
         db.create_all()
@@ -25,3 +24,169 @@ def test_login_success():
     assert resp.status_code == 200
     assert data['success'] is True
     assert 'token' in data
+
+def test_jwks_verifies_issued_token():
+    app = setup_app()
+    client = app.test_client()
+    token = client.post('/api/auth/login', json={'account_number': '111122223333', 'pin': '1234'}).get_json()['token']
+    resp = client.get('/api/auth/.well-known/jwks.json')
+    assert resp.status_code == 200
+    assert 'max-age' in resp.headers['Cache-Control']
+    import jwt
+    kid = jwt.get_unverified_header(token)['kid']
+    jwk = next(k for k in resp.get_json()['keys'] if k['kid'] == kid)
+    public_key = jwt.algorithms.RSAAlgorithm.from_jwk(jwk)
+    assert jwt.decode(token, public_key, algorithms=['RS256'])['type'] == 'access'
+    again = client.get('/api/auth/.well-known/jwks.json', headers={'If-None-Match': resp.headers['ETag']})
+    assert again.status_code == 304
+
+def test_rotated_key_still_verifies(tmp_path):
+    from flask_backend.app.utils.jwt_utils import create_access_token, verify_token
+    old = {'JWT_PRIVATE_KEY_PATH': str(tmp_path / 'old.key'), 'JWT_PUBLIC_KEY_PATH': str(tmp_path / 'old.key.pub')}
+    token = create_access_token(old, 7)
+    rotated = {
+        'JWT_PRIVATE_KEY_PATH': str(tmp_path / 'new.key'),
+        'JWT_PUBLIC_KEY_PATH': str(tmp_path / 'new.key.pub'),
+        'JWT_VERIFY_PUBLIC_KEY_PATHS': str(tmp_path / 'old.key.pub'),
+    }
+    assert verify_token(rotated, token)['sub'] == '7'
+    assert verify_token(rotated, create_access_token(rotated, 8))['sub'] == '8'
+    assert verify_token({k: v for k, v in rotated.items() if k != 'JWT_VERIFY_PUBLIC_KEY_PATHS'}, token) is None
+
+def test_verified_token_cache_hits_and_expiry(tmp_path):
+    from flask_backend.app.utils.jwt_utils import create_access_token, verify_token, token_cache_stats, evict_token
+    cfg = {'JWT_PRIVATE_KEY_PATH': str(tmp_path / 'k.key'), 'JWT_PUBLIC_KEY_PATH': str(tmp_path / 'k.key.pub')}
+    token = create_access_token(cfg, 3)
+    before = token_cache_stats()
+    assert verify_token(cfg, token)['sub'] == '3'
+    assert verify_token(cfg, token)['sub'] == '3'
+    after = token_cache_stats()
+    assert after['misses'] == before['misses'] + 1
+    assert after['hits'] == before['hits'] + 1
+    assert verify_token(cfg, token[:-4] + 'AAAA') is None
+    evict_token(token)
+    verify_token(cfg, token)
+    assert token_cache_stats()['misses'] == after['misses'] + 2
+
+def test_es256_and_eddsa_signing(tmp_path):
+    import jwt
+    from flask_backend.app.utils.jwt_utils import create_access_token, verify_token, jwks
+    for alg in ('ES256', 'EdDSA'):
+        cfg = {'JWT_ALGORITHM': alg, 'JWT_PRIVATE_KEY_PATH': str(tmp_path / f'{alg}.key'), 'JWT_PUBLIC_KEY_PATH': str(tmp_path / f'{alg}.key.pub')}
+        token = create_access_token(cfg, 5)
+        assert jwt.get_unverified_header(token)['alg'] == alg
+        assert verify_token(cfg, token)['sub'] == '5'
+        assert jwks(cfg)['keys'][0]['alg'] == alg
+    # existing key files of another type are an error, not a silent switch of algorithm
+    import pytest
+    mismatched = {'JWT_ALGORITHM': 'ES256', 'JWT_PRIVATE_KEY_PATH': str(tmp_path / 'EdDSA.key'), 'JWT_PUBLIC_KEY_PATH': str(tmp_path / 'EdDSA.key.pub')}
+    with pytest.raises(ValueError):
+        create_access_token(mismatched, 5)
+
+def test_single_identity_query_per_request():
+    from flask_backend.app.utils.auth_utils import identity_query_counts
+    app = setup_app()
+    client = app.test_client()
+    token = client.post('/api/auth/login', json={'account_number': '111122223333', 'pin': '1234'}).get_json()['token']
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/api/transactions/deposit', json={'amount': 10}, headers=headers)
+    for path, endpoint in [
+        ('/api/auth/validate', 'auth.validate'),
+        ('/api/account/balance', 'account.balance'),
+        ('/api/transactions/history', 'transactions.history'),
+        ('/api/receipts/latest/pdf', 'receipts_pdf.latest_receipt_pdf'),
+    ]:
+        before = identity_query_counts().get(endpoint, 0)
+        assert client.get(path, headers=headers).status_code == 200
+        assert identity_query_counts()[endpoint] == before + 1
+    assert client.get('/api/account/balance', headers={'Authorization': token}).status_code == 401
+    assert client.get('/api/admin/users', headers=headers).status_code == 403
+
+def test_login_upgrades_pin_hash_to_configured_method():
+    app = setup_app()
+    app.config['PIN_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    client = app.test_client()
+    login = lambda: client.post('/api/auth/login', json={'account_number': '111122223333', 'pin': '1234'})
+    assert login().status_code == 200
+    with app.app_context():
+        assert Account.query.first().pin_hash.startswith('pbkdf2:sha256:1000$')
+    assert login().status_code == 200
+    assert client.post('/api/auth/login', json={'account_number': '111122223333', 'pin': '9999'}).status_code == 401
+
+def test_login_is_503_when_pin_check_times_out():
+    app = setup_app()
+    # no spawned worker can answer within a microsecond
+    app.config.update(PIN_HASH_WORKERS=1, PIN_HASH_TIMEOUT=0.000001)
+    r = app.test_client().post('/api/auth/login', json={'account_number': '111122223333', 'pin': '1234'})
+    assert r.status_code == 503
+    assert r.get_json()['message'] == 'Service busy, please retry'
+
+def test_revoked_refresh_token_is_shared_and_bloom_filtered(tmp_path):
+    from flask_backend.app.services import revocation_service
+    app = setup_app()
+    app.config['REVOCATION_BLOOM_DIR'] = str(tmp_path)
+    app.config['REVOCATION_BLOOM_BYTES'] = 4096
+    client = app.test_client()
+    login = lambda: client.post('/api/auth/login', json={'account_number': '111122223333', 'pin': '1234'}).get_json()['refresh_token']
+    revoked, live = login(), login()
+    assert client.post('/api/auth/logout', headers={'Authorization': f'Bearer {revoked}'}).status_code == 200
+    # a fresh store stands in for another worker: it rebuilds nothing, it maps the same filter file
+    revocation_service._stores.clear()
+    resp = client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {revoked}'})
+    assert resp.status_code == 401 and resp.get_json()['message'] == 'Token revoked'
+    with app.app_context():
+        store = revocation_service.revocation_store()
+    lookups = store.db_lookups
+    assert client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {live}'}).status_code == 200
+    assert store.db_lookups == lookups and store.bloom_negatives >= 1
+    revocation_service._stores.clear()
+    for name in list(tmp_path.iterdir()):
+        name.unlink()
+    # filters lost on disk are rebuilt from the table
+    assert client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {revoked}'}).status_code == 401
+
+def test_login_throttling_lockout_and_negative_cache(tmp_path):
+    from unittest import mock
+    from flask_backend.app.utils.login_throttle import login_throttle
+    from flask_backend.app.services.auth_service import find_account_by_number
+    app = setup_app()
+    app.config.update(LOGIN_THROTTLE_ENABLED=True, LOGIN_THROTTLE_DB=str(tmp_path / 'throttle.db'),
+                      LOGIN_LOCKOUT_FAILURES=3, LOGIN_THROTTLE_ACCOUNT_LIMIT=6, LOGIN_THROTTLE_IP_LIMIT=100)
+    client = app.test_client()
+    login = lambda number, pin: client.post('/api/auth/login', json={'account_number': number, 'pin': pin})
+    with mock.patch('flask_backend.app.routes.auth.find_account_by_number', wraps=find_account_by_number) as lookup:
+        assert login('999900001111', '1234').status_code == 401
+        assert login('999900001111', '1234').get_json()['message'] == 'Account not found'
+        assert lookup.call_count == 1
+    assert login('111122223333', '0000').status_code == 401
+    assert login('111122223333', '0000').status_code == 401
+    assert login('111122223333', '0000').status_code == 423
+    resp = login('111122223333', '1234')
+    assert resp.status_code == 423 and int(resp.headers['Retry-After']) > 0
+    for _ in range(2):
+        login('111122223333', '1234')
+    resp = login('111122223333', '1234')
+    assert resp.status_code == 429 and 'Retry-After' in resp.headers
+    with app.app_context():
+        stats = login_throttle().stats()
+    assert stats['rejected_unknown'] == 1 and stats['lockouts'] == 1
+    assert stats['rejected_locked'] == 3 and stats['rejected_account'] == 1 and stats['processed'] == 4
+    # exported per outcome on /metrics (summed over every throttle this process created)
+    from flask_backend.app.utils.login_throttle import throttle_stats
+    app.config['METRICS_DIR'] = str(tmp_path / 'metrics')
+    text = client.get('/metrics').get_data(as_text=True)
+    totals = throttle_stats()
+    assert totals['rejected_locked'] >= 3
+    for outcome in ('processed', 'rejected_locked', 'rejected_account', 'rejected_unknown'):
+        assert f'atm_login_attempts_total{{outcome="{outcome}"}} {totals[outcome]}' in text
+    assert f'atm_login_failures_total{{kind="lockout"}} {totals["lockouts"]}' in text
+
+def test_login_throttle_keys_on_forwarded_client_behind_proxy(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'TRUSTED_PROXY_HOPS': 1, 'LOGIN_THROTTLE_ENABLED': True,
+                      'LOGIN_THROTTLE_DB': str(tmp_path / 'throttle.db'), 'LOGIN_THROTTLE_IP_LIMIT': 2, 'LOGIN_THROTTLE_ACCOUNT_LIMIT': 100})
+    client = app.test_client()
+    # both clients reach the app through the same proxy address
+    login = lambda ip: client.post('/api/auth/login', json={'account_number': '999900001111', 'pin': '1234'},
+                                   headers={'X-Forwarded-For': ip}, environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    assert [login('203.0.113.5').status_code for _ in range(3)][-1] == 429
+    assert login('198.51.100.7').status_code == 401
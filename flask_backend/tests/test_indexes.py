@@ -0,0 +1,45 @@
+from sqlalchemy import text
+from sqlalchemy.dialects import sqlite
+from flask_backend.app import create_app, db
+from flask_backend.app.models.user import User
+from flask_backend.app.models.account import Account
+from flask_backend.app.models.transaction import Transaction
+from flask_backend.app.models.receipt import Receipt
+
+def setup_app():
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+def query_plan(query):
+    sql = str(query.statement.compile(dialect=sqlite.dialect(), compile_kwargs={'literal_binds': True}))
+    return [row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+def assert_no_full_scan(plan):
+    for step in plan:
+        assert not (step.startswith('SCAN') and 'USING' not in step), plan
+        assert 'TEMP B-TREE' not in step, plan
+
+def test_hot_paths_use_indexes():
+    app = setup_app()
+    with app.app_context():
+        assert_no_full_scan(query_plan(Account.query.filter_by(user_id=1)))
+        assert_no_full_scan(query_plan(
+            db.session.query(User, Account).outerjoin(Account, Account.user_id == User.id).filter(User.id == 1)
+        ))
+        assert_no_full_scan(query_plan(
+            Transaction.query.filter_by(account_id=1).order_by(Transaction.created_at.desc()).limit(10)
+        ))
+        assert_no_full_scan(query_plan(Receipt.query.filter_by(transaction_id=1)))
+        assert_no_full_scan(query_plan(Transaction.query.order_by(Transaction.created_at.desc()).limit(20)))
+
+def test_upgrade_adds_missing_indexes():
+    from flask_backend.app.migrations import upgrade_schema
+    app = setup_app()
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text('DROP INDEX ix_accounts_user_id'))
+        assert upgrade_schema() == ['index ix_accounts_user_id']
+        assert upgrade_schema() == []
@@ -4,8 +4,7 @@ from flask_backend.app.models.account import Account
 from werkzeug.security import generate_password_hash
 
 def setup_app():
-    app = create_app()
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'LOGIN_THROTTLE_ENABLED': False})
     with app.app_context():
         db.drop_all()
         db.create_all()
@@ -31,3 +30,77 @@ def test_receipt_pdf_download():
     pdf_resp = client.get(f'/api/receipts/{rid}/pdf', headers=headers)
     assert pdf_resp.status_code == 200
     assert pdf_resp.content_type == 'application/pdf'
+
+def test_receipt_pdf_etag_and_cache(tmp_path):
+    app = setup_app()
+    app.config['RECEIPT_PDF_CACHE_DIR'] = str(tmp_path)
+    client = app.test_client()
+    headers = auth_headers(client)
+    rid = client.post('/api/transactions/deposit', json={'amount': 500}, headers=headers).get_json()['receipt']['id']
+    first = client.get(f'/api/receipts/{rid}/pdf', headers=headers)
+    etag = first.headers['ETag']
+    assert 'max-age' in first.headers['Cache-Control']
+    second = client.get(f'/api/receipts/{rid}/pdf', headers=headers)
+    assert second.data == first.data
+    cached = client.get(f'/api/receipts/{rid}/pdf', headers={**headers, 'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+
+def test_pdf_cache_spills_to_disk(tmp_path):
+    from flask_backend.app.utils.pdf_cache import PdfCache
+    cache = PdfCache(max_bytes=10, spill_dir=str(tmp_path), max_disk_bytes=12)
+    cache.put('a', b'123456')
+    cache.put('b', b'abcdef')
+    cache.put('c', b'ABCDEF')
+    assert cache.stats()['memory_entries'] == 1
+    assert cache.get('b') == b'abcdef'
+    assert cache.stats()['disk_hits'] == 1
+    assert cache.get('missing') is None
+
+def test_pooled_render_matches_inline():
+    from flask_backend.app.services.pdf_service import render_receipt
+    from flask_backend.app.utils.worker_pool import BoundedPool
+    fields = {
+        'receipt_number': 'RCP1', 'date': '2024-01-01 00:00:00', 'account': '****3333', 'name': 'PDF',
+        'transaction': 'Deposit', 'amount': '₹500.00', 'balance_after': '₹10,500.00',
+    }
+    pool = BoundedPool('pdf-test', workers=1, max_pending=2)
+    try:
+        pooled = pool.run(render_receipt, fields, timeout=60)
+    finally:
+        pool.shutdown()
+    assert pooled == render_receipt(fields)
+    assert pooled.startswith(b'%PDF')
+
+def test_pool_timeout_is_busy_and_keeps_slot_until_job_ends():
+    import time
+    import pytest
+    from flask_backend.app.utils.worker_pool import BoundedPool, WorkerPoolBusy
+    pool = BoundedPool('timeout-test', workers=1, max_pending=1)
+    try:
+        with pytest.raises(WorkerPoolBusy):
+            pool.run(time.sleep, 1, timeout=0.05)
+        # the sleeping child still holds the only slot
+        assert pool.stats()['pending'] == 1
+        with pytest.raises(WorkerPoolBusy):
+            pool.run(time.sleep, 0, timeout=5)
+    finally:
+        pool.shutdown()
+    stats = pool.stats()
+    assert stats['pending'] == 0
+    assert stats['timeouts'] == 1
+    assert stats['rejected'] == 1
+
+def test_statement_pdf_streams_all_pages():
+    app = setup_app()
+    client = app.test_client()
+    headers = auth_headers(client)
+    for _ in range(60):
+        client.post('/api/transactions/deposit', json={'amount': 10}, headers=headers)
+    resp = client.get('/api/account/statement/pdf', headers=headers)
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    pdf = resp.get_data()
+    assert pdf.startswith(b'%PDF') and pdf.rstrip().endswith(b'%%EOF')
+    assert b'/Count 2' in pdf
+    assert client.get('/api/account/statement/pdf?from=2024-02-01&to=2024-01-01', headers=headers).status_code == 400
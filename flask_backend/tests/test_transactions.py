@@ -3,9 +3,8 @@ from flask_backend.app.models.user import User
 from flask_backend.app.models.account import Account
 from werkzeug.security import generate_password_hash
 
-def setup_app():
-    app = create_app()
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+def setup_app(uri='sqlite:///:memory:'):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': uri, 'LOGIN_THROTTLE_ENABLED': False})
     with app.app_context():
         db.drop_all()
         db.create_all()
@@ -38,3 +37,180 @@ def test_deposit_and_history():
     h = client.get('/api/transactions/history?limit=5', headers=headers)
     assert h.status_code == 200
     assert isinstance(h.get_json(), list)
+
+def test_lost_update_race_is_409_for_deposit_and_withdraw(monkeypatch):
+    from flask_backend.app.services import transaction_service
+    app = setup_app()
+    app.config['TX_CONFLICT_RETRIES'] = 0
+    client = app.test_client()
+    headers = auth_headers(client)
+    # every guarded UPDATE finds the version already moved
+    monkeypatch.setattr(transaction_service, '_guarded_update', lambda *args: None)
+    for op in ('deposit', 'withdraw'):
+        r = client.post(f'/api/transactions/{op}', json={'amount': 100}, headers=headers)
+        assert r.status_code == 409
+        assert r.get_json()['message'] == 'Concurrent update detected'
+
+def test_withdraw_retries_stale_version_in_few_statements():
+    from decimal import Decimal
+    from sqlalchemy import event, update
+    from flask_backend.app.services.transaction_service import withdraw
+    app = setup_app()
+    with app.app_context():
+        acc = Account.query.first()
+        with db.engine.begin() as conn:
+            conn.execute(update(Account).values(version=Account.version + 1, balance=Account.balance - 100))
+        tx, receipt = withdraw(acc, Decimal('50'), daily_limit=Decimal('5000'))
+        assert float(tx.balance_after) == 9850.0
+        assert receipt.receipt_number.endswith(str(tx.id))
+
+        assert acc.balance is not None  # reload, as the identity query does at the start of a request
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            tx, _ = withdraw(acc, Decimal('50'), daily_limit=Decimal('5000'))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert float(tx.balance_after) == 9800.0
+        # account update, transaction insert, daily aggregate upsert, receipt insert
+        assert len(statements) <= 4
+        assert sum('daily_aggregates' in s for s in statements) == 1
+        assert float(db.session.get(Account, acc.id).daily_withdrawn) == 100.0
+
+def test_account_lock_serializes_concurrent_deposits(tmp_path):
+    import threading
+    from flask_backend.app.utils.account_lock import lock_stats
+    # a file, so each thread gets its own connection instead of sharing the in-memory one
+    app = setup_app(f"sqlite:///{tmp_path / 'atm.db'}")
+    app.config.update(ACCOUNT_LOCKS_ENABLED=True, ACCOUNT_LOCK_DIR=str(tmp_path))
+    headers = auth_headers(app.test_client())
+    codes = []
+
+    def worker():
+        client = app.test_client()
+        for _ in range(5):
+            codes.append(client.post('/api/transactions/deposit', json={'amount': 10}, headers=headers).status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert codes == [200] * 20
+    balance = app.test_client().get('/api/account/balance', headers=headers).get_json()['balance']
+    assert balance == 10200.0
+    assert lock_stats()['acquired'] >= 20
+
+def test_history_cursor_pagination_handles_timestamp_ties():
+    app = setup_app()
+    client = app.test_client()
+    headers = auth_headers(client)
+    for _ in range(25):
+        client.post('/api/transactions/deposit', json={'amount': 1}, headers=headers)
+    seen, cursor = [], None
+    while True:
+        url = '/api/transactions/history?limit=10' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(url, headers=headers)
+        assert page.status_code == 200
+        seen.extend(t['id'] for t in page.get_json())
+        cursor = page.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert len(seen) == 25 and len(set(seen)) == 25
+    assert seen == sorted(seen, reverse=True)
+    assert len(client.get('/api/transactions/history?limit=100000', headers=headers).get_json()) == 25
+    assert client.get('/api/transactions/history?cursor=garbage', headers=headers).status_code == 400
+
+def test_read_replica_routing_keeps_read_your_writes(tmp_path):
+    import shutil
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{primary}',
+        'READ_REPLICA_URI': f'sqlite:///{replica}',
+        'READ_REPLICA_WRITES_FILE': str(tmp_path / 'writes.bin'),
+        'LOGIN_THROTTLE_ENABLED': False,
+    })
+    with app.app_context():
+        u = User(name='Test', email='t@example.com', phone='9999999999')
+        db.session.add(u)
+        db.session.flush()
+        db.session.add(Account(user_id=u.id, account_number='111122223333', pin_hash=generate_password_hash('1234'), balance=10000.0, daily_limit=5000.0))
+        db.session.commit()
+        # "replicate" the primary once; the replica stays frozen at this point from here on
+        db.engines[None].dispose()
+        shutil.copy(primary, replica)
+    client = app.test_client()
+    headers = auth_headers(client)
+    assert client.post('/api/transactions/deposit', json={'amount': 500}, headers=headers).status_code == 200
+    # straight after the write: served by the primary
+    assert client.get('/api/account/balance', headers=headers).get_json()['balance'] == 10500.0
+    assert len(client.get('/api/transactions/history', headers=headers).get_json()) == 1
+    # once the lag window has passed, GETs go to the (stale) replica
+    app.config['READ_REPLICA_LAG_SECONDS'] = 0
+    assert client.get('/api/account/balance', headers=headers).get_json()['balance'] == 10000.0
+    assert client.get('/api/transactions/history', headers=headers).get_json() == []
+    # writes always go to the primary
+    assert client.post('/api/transactions/deposit', json={'amount': 100}, headers=headers).get_json()['transaction']['balance_after'] == 10600.0
+
+def test_metrics_endpoint_reports_latency_sql_and_outcomes(tmp_path):
+    import re
+    app = setup_app()
+    app.config['METRICS_DIR'] = str(tmp_path)
+    client = app.test_client()
+    headers = auth_headers(client)
+
+    def value(text, series):
+        m = re.search(re.escape(series) + r' (\S+)', text)
+        return float(m.group(1)) if m else 0.0
+
+    before = client.get('/metrics').get_data(as_text=True)
+    client.post('/api/transactions/deposit', json={'amount': 100}, headers=headers)
+    client.post('/api/transactions/withdraw', json={'amount': 6000}, headers=headers)
+    client.get('/api/transactions/history', headers=headers)
+    resp = client.get('/metrics')
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/plain'
+    text = resp.get_data(as_text=True)
+    assert '# TYPE atm_http_request_duration_seconds histogram' in text
+    for series, delta in (('atm_transaction_outcomes_total{type="deposit",outcome="success"}', 1),
+                          ('atm_transaction_outcomes_total{type="withdrawal",outcome="daily_limit_exceeded"}', 1),
+                          ('atm_http_request_duration_seconds_count{route="/api/transactions/history",method="GET",status="200"}', 1),
+                          ('atm_http_request_duration_seconds_bucket{route="/api/transactions/withdraw",method="POST",status="403",le="+Inf"}', 1)):
+        assert value(text, series) - value(before, series) == delta
+    # the history request ran at least its identity and page queries
+    assert value(text, 'atm_request_sql_statements_sum{route="/api/transactions/history"}') >= 2
+    assert value(text, 'atm_db_pool_checkout_wait_seconds_count') > 0
+    assert list(tmp_path.glob('metrics-*.json'))
+
+def test_profiler_and_slow_query_log_keyed_by_correlation_id(tmp_path, caplog):
+    import json
+    import logging
+    import pstats
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'PROFILE_ENABLED': True, 'PROFILE_DIR': str(tmp_path),
+                      'SLOW_QUERY_MS': 0.000001, 'LOGIN_THROTTLE_ENABLED': False})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        u = User(name='Test', email='t@example.com', phone='9999999999')
+        db.session.add(u)
+        db.session.flush()
+        db.session.add(Account(user_id=u.id, account_number='111122223333', pin_hash=generate_password_hash('1234'), balance=10000.0, daily_limit=5000.0))
+        db.session.commit()
+    client = app.test_client()
+    headers = auth_headers(client)
+    assert not list(tmp_path.iterdir())
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger='flask_backend.slow_query'):
+        r = client.post('/api/transactions/withdraw', json={'amount': 50}, headers={**headers, 'X-Profile': '1', 'X-Correlation-ID': 'slow-wd-1'})
+    assert r.headers['X-Profile-Id'] == 'slow-wd-1'
+    assert pstats.Stats(str(tmp_path / 'slow-wd-1.prof')).total_calls > 0
+    logged = [json.loads(rec.getMessage()) for rec in caplog.records if rec.name == 'flask_backend.slow_query']
+    assert logged and all(e['cid'] == 'slow-wd-1' for e in logged)
+    assert any(e['statement'].startswith('UPDATE accounts') for e in logged)
+    assert all(e['parameters'] is None for e in logged)
+    # a hostile correlation id cannot escape the profile directory
+    r = client.get('/api/account/balance', headers={**headers, 'X-Profile': '1', 'X-Correlation-ID': '../../etc/x'})
+    assert r.headers['X-Profile-Id'] == 'etcx'
+    assert (tmp_path / 'etcx.prof').exists()
@@ -4,8 +4,7 @@ from flask_backend.app.models.account import Account
 from werkzeug.security import generate_password_hash
 
 def setup_app():
-    app = create_app()
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'LOGIN_THROTTLE_ENABLED': False})
     with app.app_context():
         db.drop_all()
         db.create_all()